@@ -1,21 +1,27 @@
 from typing import Any, Dict
 import logging
-from llm.llm_client import LLMClient
+from llm.llm_client import get_shared_client
 
-# Setup basic logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+# Library code does not configure logging; entrypoints (scripts/, ui/app.py) opt in.
+logging.getLogger("agents").addHandler(logging.NullHandler())
 
 class BaseAgent:
     """Base class for all agents in the system."""
-    
+
+    # Subclasses declare their own (possibly empty) __slots__ so agent
+    # instances carry no per-instance __dict__.
+    __slots__ = ("name", "logger", "llm_client")
+
     def __init__(self, name: str):
         self.name = name
-        self.logger = logging.getLogger(name)
-        self.llm_client = LLMClient()
+        self.logger = logging.getLogger(f"agents.{name}")
+        # Process-wide client: agents share its connection pools and caches
+        self.llm_client = get_shared_client()
 
     async def run(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
         """Main execution method to be implemented by subclasses."""
         raise NotImplementedError("Agents must implement the run method")
 
-    def log(self, message: str):
-        self.logger.info(message)
+    def log(self, message: str, *args: Any):
+        # %-style args are only formatted if a handler actually emits the record
+        self.logger.info(message, *args)
@@ -1,8 +1,23 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from core.schemas import ConstraintResult, CompositeDecision, Decision, DecisionType
+from core.serialization import composite_prompt_json
 from agents.base_agent import BaseAgent
+from core import model_router
+
+# Response schemas are static; build them once at import rather than per call.
+_CONSTRAINT_SCHEMA = ConstraintResult.model_json_schema()
+
+# Hard stop for the Constraint <-> Judgment feedback loop: the graph passes
+# the number of judgment rejections so far, so checks 0 and 1 call the LLM
+# and the next one fails closed
+MAX_CONSTRAINT_RETRIES = 2
+
+# Persisted constraint verdicts older than this (seconds) are re-checked
+CONSTRAINT_CACHE_TTL = 3600
 
 class ConstraintAgent(BaseAgent):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__("constraint")
 
@@ -10,25 +25,39 @@ class ConstraintAgent(BaseAgent):
         """
         Validates the CompositeDecision from DecisionAggregator.
         """
+        retry_count = inputs.get("retry_count", 0)
+        if retry_count >= MAX_CONSTRAINT_RETRIES:
+            self.log("Retry cap reached (%s); failing closed without an LLM call", retry_count)
+            result = ConstraintResult(
+                is_safe=False,
+                warnings=["retry cap reached"],
+                retry_count=retry_count
+            )
+            return {"constraint_check": result.model_dump()}
+
         composite_decision = inputs.get("composite_decision", {}) # Dict or Pydantic
+        feedback = inputs.get("judgment_feedback")
+        composite_json = inputs.get("composite_json") or composite_prompt_json(composite_decision)
         
-        prompt = f"""
-        {CONSTRAINT_SYSTEM_PROMPT}
-        
-        ---
-        COMPOSITE DECISION (from Specialists):
-        {composite_decision}
-        
-        PREVIOUS JUDGMENT FEEDBACK (If any - Address this):
-        {inputs.get('judgment_feedback', 'None')}
-        """
+        prompt = (
+            f"COMPOSITE DECISION (from Specialists):\n{composite_json}\n\n"
+            f"PREVIOUS JUDGMENT FEEDBACK (If any - Address this):\n{feedback or 'None'}\n"
+        )
         
         result = await self.llm_client.generate_structured_output(
             prompt,
-            response_schema=ConstraintResult.model_json_schema(),
-            model="openai/gpt-oss-120b"
+            response_schema=_CONSTRAINT_SCHEMA,
+            model=model_router.pick("reasoning"),
+            system_prompt=CONSTRAINT_SYSTEM_PROMPT,
+            max_tokens=300, # Strict cap
+            temperature=0.0, # Deterministic safety path
+            # Verdicts are reused for an hour at most: safety policy may change
+            # outside the prompt text that is part of the key
+            persist=True,
+            persist_ttl=CONSTRAINT_CACHE_TTL
         )
-        return {"constraint_check": result}
+
+        return {"constraint_check": dict(result)}
 
 CONSTRAINT_SYSTEM_PROMPT = """You are CONSTRAINT_AGENT.
 
@@ -1,36 +1,18 @@
-from typing import Any, Dict
-from core.schemas import Decision, DecisionType, EconAssessment
-from agents.base_agent import BaseAgent
+from core.schemas import EconAssessment
+from agents.specialist_agent import SpecialistAgent
+
+_ECON_SCHEMA = EconAssessment.model_json_schema()
+
+class EconomicsAgent(SpecialistAgent):
+    __slots__ = ()
 
-class EconomicsAgent(BaseAgent):
     def __init__(self):
-        super().__init__("economics")
-
-    async def run(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
-        instruction = inputs.get("instruction")
-        context = inputs.get("context", {})
-        
-        prompt = f"""
-        {ECONOMICS_SYSTEM_PROMPT}
-
-        ---
-        SCENARIO CONTEXT: {context}
-        SPECIFIC INSTRUCTION: {instruction}
-        """
-        
-        result = await self.llm_client.generate_structured_output(
-            prompt,
-            response_schema=EconAssessment.model_json_schema(),
-            model="openai/gpt-oss-20b",
-            max_tokens=200 # Strict cap
-        )
-        return {"decision": result}
+        super().__init__("economics", ECONOMICS_SYSTEM_PROMPT, EconAssessment, _ECON_SCHEMA)
 
 ECONOMICS_SYSTEM_PROMPT = """You are ECONOMICS_SPECIALIST_AGENT.
 
 ROLE
 - Analyze costs, benefits, and incentives.
-- Output a typed DECISION object.
 
 OUTPUT SCHEMA
 - decision_type: APPROVE (Profitable/Sustainable), REJECT (Too Costly), MODIFY (Cheaper Option), ABORT (Bankrupts State).
@@ -38,7 +20,6 @@ OUTPUT SCHEMA
 - risk_score: 0-10 (Financial Risk).
 - rationale_summary: Max 3 bullet points.
 
-
 RISK CALIBRATION STANDARD (DO NOT DEVIATE)
 0-2: Normal geopolitical friction.
 3-4: Elevated tension (diplomatic pressure, sanctions).
@@ -50,5 +31,4 @@ PRINCIPLES
 - No free lunch.
 - High cost = High risk score.
 - LOWER confidence if uncertain, do NOT inflate risk.
-- Schema errors are system faults. Return ONLY valid JSON.
 """
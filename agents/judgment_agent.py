@@ -1,8 +1,14 @@
 from typing import Dict, Any
 from agents.base_agent import BaseAgent
+from core import model_router
 from core.schemas import JudgmentResult, Decision, DecisionType
+from core.serialization import composite_prompt_json, context_json, to_json
+
+_JUDGMENT_SCHEMA = JudgmentResult.model_json_schema()
 
 class JudgmentAgent(BaseAgent):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__("judgment")
 
@@ -13,25 +19,21 @@ class JudgmentAgent(BaseAgent):
         composite_decision = inputs.get("composite_decision", {})
         constraint_result = inputs.get("constraint_output", {}) # ConstraintResult dict
         context = inputs.get("context", {})
+        composite_json = inputs.get("composite_json") or composite_prompt_json(composite_decision)
         
-        prompt = f"""
-        {JUDGMENT_SYSTEM_PROMPT}
-        
-        ---
-        SCENARIO CONTEXT: {context}
-        
-        COMPOSITE DECISION (from Specialists):
-        {composite_decision}
-        
-        CONSTRAINT CHECK:
-        {constraint_result}
-        """
+        prompt = (
+            f"SCENARIO CONTEXT: {context_json(context)}\n\n"
+            f"COMPOSITE DECISION (from Specialists):\n{composite_json}\n\n"
+            f"CONSTRAINT CHECK:\n{to_json(constraint_result)}\n"
+        )
         
         result = await self.llm_client.generate_structured_output(
             prompt,
-            response_schema=JudgmentResult.model_json_schema(),
-            model="openai/gpt-oss-120b",
-            max_tokens=200 # Strict cap
+            response_schema=_JUDGMENT_SCHEMA,
+            model=model_router.pick("reasoning"),
+            system_prompt=JUDGMENT_SYSTEM_PROMPT,
+            max_tokens=400, # JudgmentResult embeds a full Decision
+            temperature=0.0 # Deterministic safety path
         )
         
         return {"judgment_result": result}
@@ -1,5 +1,8 @@
-from typing import Any, Dict
+import asyncio
+from typing import Any, AsyncIterator, Dict, Optional
 from agents.base_agent import BaseAgent
+from core import model_router
+from core.serialization import context_json, to_json
 from agents.planner_agent import PlannerAgent
 from agents.security_agent import SecurityAgent
 from agents.technology_agent import TechnologyAgent
@@ -7,12 +10,56 @@ from agents.economics_agent import EconomicsAgent
 from agents.constraint_agent import ConstraintAgent
 from agents.simulation_agent import SimulationAgent
 
+# Planner / prompt spellings of the specialist names -> internal keys
+_AGENT_ALIASES = {
+    "SECURITY": "security",
+    "SECURITY_AGENT": "security",
+    "SECURITY_ANALYSIS_AGENT": "security",
+    "TECHNOLOGY": "technology",
+    "TECHNOLOGY_AGENT": "technology",
+    "TECHNOLOGY_ANALYSIS_AGENT": "technology",
+    "ECONOMICS": "economics",
+    "ECONOMICS_AGENT": "economics",
+    "ECONOMICS_SPECIALIST_AGENT": "economics",
+}
+
+def _consensus_report(specialist_results: Dict[str, Any], sanitized: Dict[str, Any]) -> Optional[str]:
+    """
+    Templated final report for the uncontested case: every specialist returned
+    the same decision and action, and the constraint check raised nothing.
+    Returns None when the findings need a full synthesis.
+    """
+    if not specialist_results or not sanitized.get("is_safe"):
+        return None
+    if sanitized.get("warnings") or sanitized.get("ethical_flags") or sanitized.get("legal_flags"):
+        return None
+
+    decisions = list(specialist_results.values())
+    verdicts = {(d.get("decision_type"), d.get("recommended_action")) for d in decisions}
+    if len(verdicts) != 1:
+        return None
+
+    decision_type, action = verdicts.pop()
+    lines = [
+        "1. Recommended Strategy for Actor A",
+        f"{decision_type}: {action}",
+        "",
+        "2. Rationale",
+    ]
+    for name, decision in specialist_results.items():
+        for point in decision.get("rationale_summary", []):
+            lines.append(f"- ({name}) {point}")
+    return "\n".join(lines)
+
 class ManagerAgent(BaseAgent):
     """
     The orchestrator agent. 
     It doesn't use an LLM directly for reasoning in this simplified scope,
     but instead manages the control flow between other agents.
     """
+    __slots__ = ("planner", "security", "technology", "economics",
+                 "constraint", "simulation", "specialists")
+
     def __init__(self):
         super().__init__("manager")
         self.planner = PlannerAgent()
@@ -21,111 +68,166 @@ class ManagerAgent(BaseAgent):
         self.economics = EconomicsAgent()
         self.constraint = ConstraintAgent()
         self.simulation = SimulationAgent()
+        # Dispatch table for Phase 2
+        self.specialists = {
+            "security": self.security,
+            "technology": self.technology,
+            "economics": self.economics,
+        }
 
-    def run(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+    async def run(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
         """
         End-to-end execution flow:
         1. Plan
-        2. Execute Specialists
+        2. Execute Specialists (concurrently)
         3. Constrain
         4. Simulate
         5. Synthesize
+
+        Callers outside an event loop should use `asyncio.run(manager.run(...))`.
+        Use `run_stream` to receive the synthesis text as it is generated.
+        """
+        final_response = {}
+        async for event in self.run_stream(inputs):
+            if "final" in event:
+                final_response = event["final"]
+        return final_response
+
+    async def run_stream(self, inputs: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Same pipeline as `run`, but yields `{"partial": text}` for each synthesis
+        chunk and finishes with `{"final": response}`.
         """
         user_req = inputs.get("request")
         context = inputs.get("context", {})
+        # Shared by every specialist prompt; identical bytes also keep their prefixes aligned
+        context_str = context_json(context)
         
         self.log("Phase 1: Planning")
-        plan_output = self.planner.run({"user_request": user_req, "scenario_context": context})
+        plan_output = await self.planner.run({"user_request": user_req, "scenario_context": context})
         plan = plan_output["plan"]
         
         self.log("Phase 2: Specialist Execution")
-        specialist_results = {}
+        dispatched = [] # (agent, prompt, schema) in plan order
+        plan_summary = []
         for step in plan.get("steps", []):
-            agent_name = step.get("assigned_agent")
+            raw_name = step.get("assigned_agent")
             # Fallback for old schema if needed, but primary is new
-            if not agent_name: 
-                agent_name = step.get("agent_name")
+            if not raw_name: 
+                raw_name = step.get("agent_name") or step.get("agent", "")
             
             # Normalize agent names from the planner prompt to internal keys
-            if "SECURITY" in agent_name: agent_name = "security"
-            elif "TECHNOLOGY" in agent_name: agent_name = "technology"
-            elif "ECONOMICS" in agent_name: agent_name = "economics"
-            else: agent_name = agent_name.lower()
+            agent_name = _AGENT_ALIASES.get(raw_name.upper())
+            if agent_name is None:
+                # Free-form spellings ("Security Analyst", "economics_expert")
+                agent_name = next((k for k in self.specialists if k.upper() in raw_name.upper()), raw_name.lower())
 
             instruction = f"{step.get('description', '')} \nOutput Goal: {step.get('expected_output', '')}"
             if not step.get('description'):
-                instruction = step.get("instruction", "")
-            
-            self.log(f"Delegating to {agent_name}: {instruction}")
+                instruction = step.get("instruction") or step.get("objective", "")
+            plan_summary.append(instruction)
             
-            if agent_name == "security":
-                res = self.security.run({"instruction": instruction, "context": context})
-                specialist_results["security"] = res["security_analysis"]
-            elif agent_name == "technology":
-                res = self.technology.run({"instruction": instruction, "context": context})
-                specialist_results["technology"] = res["technology_analysis"]
-            elif agent_name == "economics":
-                res = self.economics.run({"instruction": instruction, "context": context})
-                specialist_results["economics"] = res["economics_analysis"]
-            else:
-                self.log(f"Unknown agent: {agent_name}")
-
-        self.log("Phase 3: Constraint Checking")
-        constraint_output = self.constraint.run({"specialist_outputs": specialist_results})
-        sanitized = constraint_output["constraint_check"]
+            agent = self.specialists.get(agent_name)
+            if agent is None:
+                self.log("Unknown agent: %s", agent_name)
+                continue
+
+            self.log("Delegating to %s: %s", agent_name, instruction)
+            prompt, schema = agent.prepare({"instruction": instruction, "context_str": context_str})
+            dispatched.append((agent, prompt, schema))
+
+        # Specialist calls are independent and share a model tier, so they go
+        # out as one batch: Phase 2 costs max(latencies), not sum(latencies).
+        results = await self.llm_client.generate_structured_output_batch(
+            [prompt for _, prompt, _ in dispatched],
+            [schema for _, _, schema in dispatched],
+            model=model_router.pick("assessment"),
+            system_prompts=[agent.system_prompt for agent, _, _ in dispatched],
+            max_tokens=200
+        )
+
+        specialist_results = {}
+        for (agent, _, _), res in zip(dispatched, results):
+            if isinstance(res, Exception):
+                self.log("Specialist %s failed: %s", agent.name, res)
+                continue
+            specialist_results[agent.name] = res
 
-        self.log("Phase 4: Simulation")
+        self.log("Phase 3+4: Constraint Checking / Simulation")
         # Extract actors from context or defaults
         actors = context.get("actors", {"A": "Actor A", "B": "Actor B", "C": "Actor C"})
-        sim_input = {
-            "actors": actors,
-            "strategies": context.get("strategies", {}),
-            "max_turns": context.get("max_turns", 3)
-        }
-        # Add sanitized recommendations to simulation context (implicitly via strategies or just logging)
-        # For this demo, we assume the simulation uses the base context + "sanitized_recommendations" guidance
-        # but our simulation agent is simple. We'll pass them in.
-        sim_input["strategies"]["Global_Constraint"] = sanitized.get("sanitized_recommendations_for_A", [])
-        
-        sim_output = self.simulation.run(sim_input)
+
+        def build_sim_input(recommendations):
+            # Sanitized recommendations reach the simulation as a global strategy constraint
+            strategies = dict(context.get("strategies", {}))
+            strategies["Global_Constraint"] = recommendations
+            return {
+                "actors": actors,
+                "strategies": strategies,
+                "max_turns": context.get("max_turns", 3)
+            }
+
+        # Simulation only depends on Constraint through the sanitized
+        # recommendations, so start it speculatively with none and keep the
+        # result unless Constraint comes back with some.
+        sim_task = asyncio.create_task(self.simulation.run(build_sim_input([])))
+        try:
+            constraint_output = await self.constraint.run({"composite_decision": specialist_results})
+        except BaseException:
+            sim_task.cancel()
+            await asyncio.gather(sim_task, return_exceptions=True)
+            raise
+        sanitized = constraint_output["constraint_check"]
+
+        recommendations = sanitized.get("sanitized_recommendations_for_A", [])
+        if not recommendations:
+            sim_output = await sim_task
+        else:
+            # The speculative run is a full reasoning-tier call; it is lost here
+            self.log("Constraint changed simulation inputs; discarding speculative simulation and re-running")
+            sim_task.cancel()
+            await asyncio.gather(sim_task, return_exceptions=True)
+            sim_output = await self.simulation.run(build_sim_input(recommendations))
 
         self.log("Phase 5: Synthesis")
-        
-        # Construct context for the final LLM synthesis
-        synthesis_prompt = f"""
-        {MANAGER_SYSTEM_PROMPT}
-        
-        ---
-        USER REQUEST: {user_req}
-        
-        PLAN:
-        {plan}
-        
-        SPECIALIST FINDINGS:
-        {specialist_results}
-        
-        CONSTRAINTS:
-        {sanitized}
-        
-        SIMULATION OUTCOME:
-        {sim_output}
-        
-        Produce the FINAL ANSWER to the user now.
-        """
-        
-        # Legacy sync wrapper usage
-        final_text = self.llm_client.generate_text(synthesis_prompt, model_type="reasoning")
+
+        final_text = _consensus_report(specialist_results, sanitized)
+        if final_text is not None:
+            # Nothing to reconcile: skip the reasoning-model call
+            self.log("Specialists agree and constraints are clean; using templated report")
+            yield {"partial": final_text}
+        else:
+            # Construct context for the final LLM synthesis
+            synthesis_prompt = (
+                f"USER REQUEST: {user_req}\n\n"
+                f"PLAN:\n{to_json(plan)}\n\n"
+                f"SPECIALIST FINDINGS:\n{to_json(specialist_results)}\n\n"
+                f"CONSTRAINTS:\n{to_json(sanitized)}\n\n"
+                f"SIMULATION OUTCOME:\n{to_json(sim_output)}\n\n"
+                "Produce the FINAL ANSWER to the user now.\n"
+            )
+
+            chunks = []
+            async for chunk in self.llm_client.generate_text_stream(
+                synthesis_prompt,
+                model=model_router.pick("reasoning"),
+                system_prompt=MANAGER_SYSTEM_PROMPT,
+                max_tokens=800
+            ):
+                chunks.append(chunk)
+                yield {"partial": chunk}
+            final_text = "".join(chunks)
 
         final_response = {
             "original_request": user_req,
-            "plan_summary": [s.get("instruction") for s in plan.get("steps", [])],
+            "plan_summary": plan_summary,
             "specialist_findings": specialist_results,
             "constraints": sanitized,
             "simulation_result": sim_output,
             "manager_report": final_text
         }
-        
-        return final_response
+
+        yield {"final": final_response}
 
 MANAGER_SYSTEM_PROMPT = """You are the MANAGER AGENT in a multi-agent reasoning and simulation system.
 
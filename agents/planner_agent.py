@@ -1,8 +1,23 @@
+import hashlib
+from collections import OrderedDict
 from typing import List, Any, Dict
 from core.schemas import ExecutionPlan
+from core.serialization import context_json, to_json
 from agents.base_agent import BaseAgent
+from core import model_router
+
+_PLAN_SCHEMA = ExecutionPlan.model_json_schema()
+
+# Plans keyed on a digest of (request, context). Re-plans of the same
+# request within a process reuse the earlier plan.
+_PLAN_CACHE: "OrderedDict[bytes, Dict[str, Any]]" = OrderedDict()
+_PLAN_CACHE_MAX = 128
+# Persisted plans older than this (seconds) are re-planned
+PLAN_CACHE_TTL = 86400
 
 class PlannerAgent(BaseAgent):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__("planner")
 
@@ -13,25 +28,36 @@ class PlannerAgent(BaseAgent):
         req = inputs["user_request"]
         ctx = inputs["scenario_context"]
         
-        prompt = f"""
-        {PLANNER_SYSTEM_PROMPT}
-        
-        REQUEST: {req}
-        CONTEXT: {ctx}
-        """
+        ctx_str = context_json(ctx)
+        cache_key = hashlib.blake2b(to_json([req, ctx_str]).encode(), digest_size=16).digest()
+        cached = _PLAN_CACHE.get(cache_key)
+        if cached is not None:
+            _PLAN_CACHE.move_to_end(cache_key)
+            return {"plan": dict(cached)}
+
+        # Context first: it repeats across re-plans, the request wording varies
+        prompt = f"CONTEXT: {ctx_str}\nREQUEST: {req}\n"
         
         try:
             result = await self.llm_client.generate_structured_output(
                 prompt,
-                response_schema=ExecutionPlan.model_json_schema(),
-                model="openai/gpt-oss-120b",
-                max_tokens=300 # Strict cap
+                response_schema=_PLAN_SCHEMA,
+                model=model_router.pick("reasoning"),
+                system_prompt=PLANNER_SYSTEM_PROMPT,
+                max_tokens=300, # Strict cap
+                # The scenario is usually static between runs; reuse the plan for a day
+                persist=True,
+                persist_ttl=PLAN_CACHE_TTL
             )
-            return {"plan": result}
         except Exception as e:
-            self.log(f"Planning failed: {e}")
+            self.log("Planning failed: %s", e)
             raise e
 
+        _PLAN_CACHE[cache_key] = result
+        if len(_PLAN_CACHE) > _PLAN_CACHE_MAX:
+            _PLAN_CACHE.popitem(last=False)
+        return {"plan": dict(result)}
+
 PLANNER_SYSTEM_PROMPT = """You are PLANNER_AGENT.
 
 ROLE
@@ -1,14 +1,32 @@
 from typing import Any, Dict, List
-from pydantic import BaseModel, Field
 from agents.base_agent import BaseAgent
+from core import model_router
+from core.serialization import canonical_json
+from core.schemas import SimulationAnalysis, Decision, DecisionType
 
-class SimScenario(BaseModel):
-    name: str
-    assumptions: List[str]
-    expected_behaviour: Dict[str, str]
-from core.schemas import SimulationResult, SimulationTurn, ValidationResult, Decision
+# Matches the reply SIMULATION_SYSTEM_PROMPT asks for
+_SIM_SCHEMA = SimulationAnalysis.model_json_schema()
+
+# Per-call payload only; the role prompt travels as the system message
+_SIM_USER_TEMPLATE = (
+    "DECISION: {decision}\n"
+    "WORLD STATE: {state}\n"
+    "ACTORS: {actors}\n"
+    "STRATEGIES / CONSTRAINTS: {strategies}\n"
+    "HORIZON: {max_turns} turns\n"
+    "Compare exactly {n_scenarios} scenarios.\n"
+)
+
+# Scenario budget: two scenarios when the specialists broadly agree, more
+# only when the aggregate was contested. Output tokens scale per scenario.
+SCENARIOS_DEFAULT = 2
+SCENARIOS_CONTESTED = 4
+CONTESTED_CONSENSUS = 0.4
+TOKENS_PER_SCENARIO = 400
 
 class SimulationAgent(BaseAgent):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__("simulation")
 
@@ -17,18 +35,17 @@ class SimulationAgent(BaseAgent):
         Executes a turn-based simulation enforcing strict state.
         Now receives a FINAL DECISION (Action) to simulate.
         """
-        final_decision_dict = inputs.get("final_decision", {})
+        final_decision = inputs.get("final_decision", {})
         current_state = inputs.get("simulation_state", {}) # Current world state
         history = inputs.get("history", [])
         
         # We need the decision object
         try:
-             # It might be passed as dict
-             decision = Decision(**final_decision_dict)
+             # A Decision passes through as-is; dicts are validated
+             decision = Decision.model_validate(final_decision)
         except Exception:
              # "Never block on missing intelligence"
              # Construct conservative default
-             from core.schemas import DecisionType
              decision = Decision(
                  decision_type=DecisionType.MODIFY,
                  recommended_action="Maintain Status Quo (System Degraded)",
@@ -37,17 +54,26 @@ class SimulationAgent(BaseAgent):
                  rationale_summary=["Input decision invalid; using baseline"]
              )
 
-        prompt = f"""
-        {SIMULATION_SYSTEM_PROMPT}
-        
-        ACTORS: {actors}
-        STRATEGIES / CONSTRAINTS: {strategies}
-        """
-        
-        result = self.llm_client.generate_structured_output(
+        contested = inputs.get("consensus_score", 1.0) < CONTESTED_CONSENSUS
+        n_scenarios = SCENARIOS_CONTESTED if contested else SCENARIOS_DEFAULT
+
+        prompt = _SIM_USER_TEMPLATE.format(
+            decision=decision.model_dump_json(),
+            state=canonical_json(current_state),
+            actors=canonical_json(inputs.get("actors", {})),
+            strategies=canonical_json(inputs.get("strategies", {})),
+            max_turns=inputs.get("max_turns", 3),
+            n_scenarios=n_scenarios
+        )
+
+        result = await self.llm_client.generate_structured_output(
             prompt,
-            response_schema=SimulationResult.model_json_schema(),
-            model="openai/gpt-oss-120b"
+            response_schema=_SIM_SCHEMA,
+            model=model_router.pick("reasoning"),
+            system_prompt=SIMULATION_SYSTEM_PROMPT,
+            max_tokens=TOKENS_PER_SCENARIO * n_scenarios,
+            # Repeated scenarios send byte-identical prompts; keep the reply across runs
+            persist=True
         )
         
         # result is a dict, so we handle it as such
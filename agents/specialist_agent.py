@@ -0,0 +1,148 @@
+from functools import lru_cache
+from typing import Annotated, Any, Dict, List, Tuple, Type
+from pydantic import BaseModel, Field, create_model
+from agents.base_agent import BaseAgent
+from core import model_router
+from core.serialization import context_json
+
+@lru_cache(maxsize=32)
+def _batch_model(item_model: Type[BaseModel], count: int) -> Type[BaseModel]:
+    """
+    `{"decisions": [...]}` with exactly `count` items. The client validates
+    replies against it before caching, so a short, long or malformed batch
+    is never stored or replayed.
+    """
+    return create_model(
+        f"{item_model.__name__}Batch",
+        decisions=(Annotated[List[item_model], Field(min_length=count, max_length=count)], ...)
+    )
+
+class SpecialistAgent(BaseAgent):
+    """
+    Shared run loop for the specialist panel (security, technology, economics).
+    Subclasses only supply their system prompt, response schema and model tier.
+    Replies are persisted in the LLM disk cache, so a repeated scenario in a
+    later process skips the round-trip.
+    """
+    __slots__ = ("system_prompt", "response_model", "response_schema", "model", "max_tokens", "_batch_schema")
+
+    def __init__(self, name: str, system_prompt: str, response_model: Type[BaseModel],
+                 response_schema: Dict[str, Any], tier: str = "assessment", max_tokens: int = 200):
+        super().__init__(name)
+        self.system_prompt = system_prompt
+        self.response_model = response_model
+        self.response_schema = response_schema
+        self.model = model_router.pick(tier)
+        self.max_tokens = max_tokens
+        self._batch_schema = None
+
+    def prepare(self, inputs: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """
+        Returns the (prompt, response_schema) pair for one specialist call.
+        The prompt is only the per-call payload; `system_prompt` is sent separately.
+        Callers fanning out to several specialists can pass a pre-serialized
+        `context_str` so the context is encoded once per request.
+        """
+        instruction = inputs.get("instruction")
+        context_str = inputs.get("context_str")
+        if context_str is None:
+            context_str = context_json(inputs.get("context", {}))
+        prompt = f"SCENARIO CONTEXT: {context_str}\nSPECIFIC INSTRUCTION: {instruction}\n"
+        return prompt, self.response_schema
+
+    async def run(self, inputs: Dict[str, Any]) -> BaseModel:
+        """Returns the validated `response_model` instance for this specialist."""
+        prompt, schema = self.prepare(inputs)
+        result = await self.llm_client.generate_structured_output(
+            prompt,
+            response_schema=schema,
+            model=self.model,
+            system_prompt=self.system_prompt,
+            response_model=self.response_model,
+            max_tokens=self.max_tokens, # Strict cap
+            persist=True
+        )
+        return result
+
+    def batch_schema(self) -> Dict[str, Any]:
+        """Wraps the per-step schema as `{"decisions": [...]}`, hoisting `$defs` so refs still resolve."""
+        schema = self._batch_schema
+        if schema is None:
+            item = {k: v for k, v in self.response_schema.items() if k != "$defs"}
+            schema = {
+                "title": f"{item.get('title', self.name)}Batch",
+                "type": "object",
+                "properties": {"decisions": {"type": "array", "items": item}},
+                "required": ["decisions"],
+            }
+            if "$defs" in self.response_schema:
+                schema["$defs"] = self.response_schema["$defs"]
+            self._batch_schema = schema
+        return schema
+
+    async def run_batch(self, instructions: List[str], inputs: Dict[str, Any]) -> List[BaseModel]:
+        """
+        Answers several instructions against the same context in one call.
+        Returns one validated `response_model` per instruction, in order; a
+    reply with the wrong count fails validation (JSONGenerationError).
+        """
+        context_str = inputs.get("context_str")
+        if context_str is None:
+            context_str = context_json(inputs.get("context", {}))
+        tasks = "\n".join(f"{i}. {text}" for i, text in enumerate(instructions, 1))
+        prompt = (
+            f"SCENARIO CONTEXT: {context_str}\n"
+            f"INSTRUCTIONS (return one decision per instruction, in order):\n{tasks}\n"
+        )
+        result = await self.llm_client.generate_structured_output(
+            prompt,
+            response_schema=self.batch_schema(),
+            model=self.model,
+            system_prompt=self.system_prompt,
+            max_tokens=self.max_tokens * len(instructions),
+            response_model=_batch_model(self.response_model, len(instructions)),
+            persist=True
+        )
+        return list(result.decisions)
+
+# Panel system prompts by the (sorted) specialist names they combine
+_PANEL_PROMPTS: Dict[Tuple[str, ...], str] = {}
+
+def panel_compatible(agents: List[SpecialistAgent]) -> bool:
+    """True when the specialists share a response schema and model, so one call can answer for all."""
+    first = agents[0]
+    return all(a.model == first.model and a.response_schema == first.response_schema for a in agents[1:])
+
+async def run_panel(rows: List[Tuple[SpecialistAgent, str]], context_str: str) -> List[BaseModel]:
+    """
+    Answers instructions for several specialists in one call. Each role's
+    system prompt is carried in a combined system message, and each task
+    names the role that answers it. Returns one validated decision per row,
+    in order. Callers check `panel_compatible` first.
+    """
+    roles = {a.name: a for a, _ in rows}
+    names = tuple(sorted(roles))
+    system_prompt = _PANEL_PROMPTS.get(names)
+    if system_prompt is None:
+        system_prompt = _PANEL_PROMPTS[names] = (
+            "You are a PANEL of specialist analysts. Each instruction names the "
+            "specialist who answers it; answer strictly within that role.\n\n"
+            + "\n\n".join(f"=== {n.upper()} ===\n{roles[n].system_prompt}" for n in names)
+        )
+    first = rows[0][0]
+    tasks = "\n".join(f"{i}. [{a.name.upper()}] {text}" for i, (a, text) in enumerate(rows, 1))
+    prompt = (
+        f"SCENARIO CONTEXT: {context_str}\n"
+        f"INSTRUCTIONS (return one decision per instruction, in order):\n{tasks}\n"
+    )
+    result = await first.llm_client.generate_structured_output(
+        prompt,
+        response_schema=first.batch_schema(),
+        model=first.model,
+        system_prompt=system_prompt,
+        max_tokens=sum(a.max_tokens for a, _ in rows),
+        # Compatible specialists share one response model
+        response_model=_batch_model(first.response_model, len(rows)),
+        persist=True
+    )
+    return list(result.decisions)
@@ -1,36 +1,18 @@
-from typing import Any, Dict
-from core.schemas import Decision, DecisionType
-from agents.base_agent import BaseAgent
+from core.schemas import Decision
+from agents.specialist_agent import SpecialistAgent
+
+_TECHNOLOGY_SCHEMA = Decision.model_json_schema()
+
+class TechnologyAgent(SpecialistAgent):
+    __slots__ = ()
 
-class TechnologyAgent(BaseAgent):
     def __init__(self):
-        super().__init__("technology")
-
-    async def run(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
-        instruction = inputs.get("instruction")
-        context = inputs.get("context", {})
-        
-        prompt = f"""
-        {TECHNOLOGY_SYSTEM_PROMPT}
-
-        ---
-        SCENARIO CONTEXT: {context}
-        SPECIFIC INSTRUCTION: {instruction}
-        """
-        
-        result = await self.llm_client.generate_structured_output(
-            prompt,
-            response_schema=Decision.model_json_schema(),
-            model="openai/gpt-oss-20b",
-            max_tokens=200 # Strict cap
-        )
-        return {"decision": result}
+        super().__init__("technology", TECHNOLOGY_SYSTEM_PROMPT, Decision, _TECHNOLOGY_SCHEMA)
 
 TECHNOLOGY_SYSTEM_PROMPT = """You are TECHNOLOGY_ANALYSIS_AGENT.
 
 ROLE
 - Evaluate feasibility, timelines, and technical advantage.
-- Output a typed DECISION object.
 
 OUTPUT SCHEMA
 - decision_type: APPROVE (Feasible), REJECT (Impossible/Too Risky), MODIFY (Needs R&D), ABORT.
@@ -38,7 +20,6 @@ OUTPUT SCHEMA
 - risk_score: 0-10 (Failure risk).
 - rationale_summary: Max 3 key technical constraints.
 
-
 RISK CALIBRATION STANDARD (DO NOT DEVIATE)
 0-2: Normal geopolitical friction.
 3-4: Elevated tension (diplomatic pressure, sanctions).
@@ -50,5 +31,4 @@ PRINCIPLES
 - Be realistic about timelines.
 - Magic tech = ABORT.
 - LOWER confidence if uncertain, do NOT inflate risk.
-- Schema errors are system faults. Return ONLY valid JSON.
 """
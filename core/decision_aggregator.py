@@ -1,6 +1,11 @@
 from typing import List
 from core.schemas import SpecialistDecision, CompositeDecision, Decision, DecisionType
 
+# Decision types as small ints for vote counting. DecisionType is a str enum,
+# so raw "APPROVE"-style strings (e.g. from model_construct) index the same slot.
+_DT_INDEX = {t: i for i, t in enumerate(DecisionType)}
+_DT_BY_INDEX = tuple(DecisionType)
+
 class DecisionAggregator:
     """
     Deterministic component to merge specialist decisions.
@@ -8,12 +13,18 @@ class DecisionAggregator:
     """
     
     @staticmethod
+    def is_qualified_abort(decision: Decision) -> bool:
+        # "ABORT allowed ONLY if: ≥2 independent... AND risk >= 8 AND confidence >= 0.6"
+        return (decision.decision_type == DecisionType.ABORT
+                and decision.risk_score >= 8 and decision.confidence >= 0.6)
+
     @staticmethod
     def aggregate(specialist_decisions: List[SpecialistDecision]) -> CompositeDecision:
-        # Filter buckets
-        valid_sds = [sd for sd in specialist_decisions if sd.decision is not None]
-        signals = [sd for sd in specialist_decisions if sd.signal is not None]
-        faults = [sd for sd in specialist_decisions if sd.fault is not None]
+        # Filter buckets, one pass keyed on the payload tag
+        buckets = {"decision": [], "signal": [], "fault": [], None: []}
+        for sd in specialist_decisions:
+            buckets[sd.kind].append(sd)
+        valid_sds, signals, faults = buckets["decision"], buckets["signal"], buckets["fault"]
         
         # --- DEGRADED MODE (Intelligence Salvage) ---
         if len(valid_sds) < 2 and signals:
@@ -36,11 +47,11 @@ class DecisionAggregator:
                  rationale.append(f"Signal ({s.agent}): {'; '.join(s.signal.summary_points)}")
             
             # Construct Composite
-            return CompositeDecision(
-                primary_decision=Decision(
+            return CompositeDecision.model_construct(
+                primary_decision=Decision.model_construct(
                     decision_type=DecisionType.MODIFY,
                     recommended_action="Adaptive Response (Salvaged Intelligence)",
-                    confidence=0.3 + (0.1 * len(signals)), # Proportional confidence
+                    confidence=min(1.0, 0.3 + (0.1 * len(signals))), # Proportional confidence
                     risk_score=final_risk,
                     rationale_summary=rationale[:3]
                 ),
@@ -51,8 +62,8 @@ class DecisionAggregator:
 
         if not valid_sds:
             # "If zero Decisions exist (and no signals): status = DEGRADED_LLM... NOT ABORT"
-             return CompositeDecision(
-                primary_decision=Decision(
+             return CompositeDecision.model_construct(
+                primary_decision=Decision.model_construct(
                     decision_type=DecisionType.MODIFY, # Conservative default
                     recommended_action="System Degraded: Proceeding with conservative baseline.",
                     confidence=0.0,
@@ -65,53 +76,52 @@ class DecisionAggregator:
             )
 
         # --- RISK CALIPRATION ---
+        # Single sweep over the decisions collects every statistic used below
+        risks = []
+        confidence_total = 0.0
+        low_risk_count = 0
+        abort_risks = []
+        type_counts = [0] * len(_DT_BY_INDEX)
+        types_seen = [] # arrival order: ties go to the first type seen
+        rationale = []
+        for sd in valid_sds:
+            d = sd.decision
+            risk = d.risk_score
+            risks.append(risk)
+            confidence_total += d.confidence
+            t = _DT_INDEX[d.decision_type]
+            if not type_counts[t]:
+                types_seen.append(t)
+            type_counts[t] += 1
+            if risk <= 3:
+                low_risk_count += 1
+            if DecisionAggregator.is_qualified_abort(d):
+                abort_risks.append(risk)
+            if len(rationale) < 3:
+                rationale.append(f"[{sd.agent}] Risk {risk}: {d.rationale_summary[0] if d.rationale_summary else ''}")
+
         # "If risks disagree -> choose the MEDIAN"
-        risks = sorted([sd.decision.risk_score for sd in valid_sds])
+        risks.sort()
         mid = len(risks) // 2
         median_risk = (risks[mid] + risks[~mid]) / 2
-        
-        # 2. Check for abort overrides (Safety First)
-        # "ABORT allowed ONLY if: ≥2 independent... AND risk >= 8 AND confidence >= 0.6"
-        abort_candidates = [sd for sd in valid_sds if sd.decision.decision_type == DecisionType.ABORT]
-        
-        valid_aborts = []
-        for sd in abort_candidates:
-             if sd.decision.risk_score >= 8 and sd.decision.confidence >= 0.6:
-                 valid_aborts.append(sd)
-        
-        conflicts = []
-        action_votes = {}
-        rationale_pool = []
-        assumptions_pool = []
-        
-        for sd in valid_sds:
-            rationale_pool.extend([f"[{sd.agent}] {r}" for r in sd.decision.rationale_summary])
-            assumptions_pool.extend(sd.decision.assumptions)
-            act = sd.decision.recommended_action
-            action_votes[act] = action_votes.get(act, 0) + 1
 
-        # 3. Formulate Primary Decision
-        if len(valid_aborts) >= 2:
+        # Formulate Primary Decision (abort overrides first: Safety First)
+        if len(abort_risks) >= 2:
             primary_type = DecisionType.ABORT
-            primary_action = "Abort: Multiple validated critical failure signals"
-            final_risk = max(sd.decision.risk_score for sd in valid_aborts)
-            consensus = len(valid_aborts) / len(valid_sds)
+            final_risk = max(abort_risks)
+            consensus = len(abort_risks) / len(valid_sds)
         else:
-            # Downgrade solo aborts or low-confidence aborts
-            pass
-            
-        # Continue with standard logic if not aborted...
-        if 'primary_type' not in locals():
+            # Solo or low-confidence aborts only count as ordinary votes below
             # Standard logic (Risk check, Majority vote)
+            final_risk = int(median_risk + 0.5) # Round half up: err toward caution
+            consensus = low_risk_count / len(valid_sds)
+            bias_approve = low_risk_count * 2 > len(valid_sds) and final_risk <= 3
             if final_risk >= 7:
                  primary_type = DecisionType.REJECT
             elif bias_approve:
                  primary_type = DecisionType.APPROVE
             else:
-                 from collections import Counter
-                 # If we have a single abort that we ignored, it's just one vote here
-                 type_counts = Counter(types)
-                 primary_type = type_counts.most_common(1)[0][0]
+                 primary_type = _DT_BY_INDEX[max(types_seen, key=type_counts.__getitem__)]
 
         candidates = [sd for sd in valid_sds if sd.decision.decision_type == primary_type]
         if not candidates:
@@ -120,26 +130,23 @@ class DecisionAggregator:
         best_sd = min(candidates, key=lambda x: abs(x.decision.risk_score - final_risk))
         primary_action = best_sd.decision.recommended_action
         
-        rationale = []
-        for sd in valid_sds:
-             rationale.append(f"[{sd.agent}] Risk {sd.decision.risk_score}: {sd.decision.rationale_summary[0] if sd.decision.rationale_summary else ''}")
-        
         # Append fault warnings if any
         if faults:
             rationale.append(f"Warning: {len(faults)} agents incurred faults.")
 
-        final_decision = Decision(
+        # Every field is derived from already-validated Decisions, so skip re-validation
+        final_decision = Decision.model_construct(
             decision_type=primary_type,
             recommended_action=primary_action,
-            confidence=sum(sd.decision.confidence for sd in valid_sds) / len(valid_sds),
+            confidence=confidence_total / len(valid_sds),
             risk_score=final_risk,
             rationale_summary=rationale[:3],
             assumptions=best_sd.decision.assumptions
         )
         
-        return CompositeDecision(
+        return CompositeDecision.model_construct(
             primary_decision=final_decision,
             conflicts=[],
-            consensus_score=low_risk_count / len(valid_sds), 
+            consensus_score=consensus,
             specialist_decisions=specialist_decisions # Return full list including faults for audit
         )
@@ -0,0 +1,52 @@
+import asyncio
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+
+def estimate_tokens(messages: List[Dict[str, Any]], max_tokens: Optional[int] = None) -> int:
+    """Rough request cost: ~4 characters per prompt token plus the output budget."""
+    prompt_chars = sum(len(m.get("content") or "") for m in messages)
+    return prompt_chars // 4 + (max_tokens or 0)
+
+
+class AsyncTokenBucket:
+    """
+    Requests-per-second and tokens-per-minute buckets checked together.
+
+    `acquire` reserves capacity up front and then sleeps off any deficit, so no
+    lock is held across an await and callers are admitted in arrival order.
+    The bookkeeping is guarded by a thread lock, which makes one bucket safe to
+    share between the event loops of different worker threads.
+    """
+
+    def __init__(self, rps: float, tpm: float):
+        self.rps = rps
+        self.tpm = tpm
+        self._request_capacity = max(rps, 1.0)
+        self._requests = self._request_capacity
+        self._tokens = tpm
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: int) -> float:
+        """Takes one request and `tokens` from the buckets; returns the seconds to wait."""
+        # A single call larger than the whole minute budget would otherwise never clear
+        tokens = min(tokens, self.tpm)
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._updated
+            self._updated = now
+            self._requests = min(self._request_capacity, self._requests + elapsed * self.rps)
+            self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60.0)
+
+            self._requests -= 1
+            self._tokens -= tokens
+            request_wait = -self._requests / self.rps if self._requests < 0 else 0.0
+            token_wait = -self._tokens * 60.0 / self.tpm if self._tokens < 0 else 0.0
+            return max(request_wait, token_wait)
+
+    async def acquire(self, tokens: int = 0) -> None:
+        delay = self._reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
@@ -0,0 +1,16 @@
+from llm.llm_client import MODEL_FAST, MODEL_REASONING
+
+# Model per workload tier. Callers name the kind of output they need rather
+# than a model, so tiers can be retargeted in one place.
+MODEL_TIERS = {
+    "verdict": "llama-3.1-8b-instant",  # one-line / tiny outputs
+    "assessment": MODEL_FAST,           # bounded structured verdicts
+    "reasoning": MODEL_REASONING,       # planning, judgment, scenario generation
+}
+
+def pick(tier: str) -> str:
+    """Returns the model id for a workload tier."""
+    try:
+        return MODEL_TIERS[tier]
+    except KeyError:
+        raise ValueError(f"Unknown model tier: {tier!r}") from None
@@ -0,0 +1,41 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class ResponseCache:
+    """
+    Bounded in-process LRU of LLM replies, safe to share across threads.
+    Structured-output entries hold either the cleaned JSON text, parsed
+    fresh on every hit, or a frozen model instance that the caller
+    deep-copies on the way in and out, so callers never share mutable
+    results; callers storing dicts copy on the way out.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(*parts: str) -> bytes:
+        h = hashlib.blake2b(digest_size=16)
+        for part in parts:
+            h.update(part.encode())
+            h.update(b"\x1f") # Separator so ("ab", "c") != ("a", "bc")
+        return h.digest()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            text = self._entries.get(key)
+            if text is not None:
+                self._entries.move_to_end(key)
+            return text
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
@@ -1,6 +1,8 @@
 from typing import Any, Dict, List, Optional, Literal
+from dataclasses import dataclass, field
+from functools import lru_cache
 from enum import Enum
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, field_validator
 import uuid
 
 # --- Enums ---
@@ -28,6 +30,8 @@ class RunStatus(str, Enum):
 # --- Structured Outputs ---
 
 class Decision(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     decision_type: DecisionType
     recommended_action: str
     confidence: float = Field(..., ge=0, le=1)
@@ -36,15 +40,15 @@ class Decision(BaseModel):
     assumptions: List[str] = Field(default_factory=list)
     meta: Dict[str, Any] = Field(default_factory=dict)
 
-# Agent-Specific Schemas (Inherit from Decision for consistency)
-class SecurityAssessment(Decision):
-    pass
-
-class EconAssessment(Decision):
-    pass
+# Agent-Specific Schemas. They add no fields, so they are aliases rather than
+# subclasses that would each build their own validator and JSON schema.
+SecurityAssessment = Decision
+EconAssessment = Decision
 
 # Replaces SpecialistOutput but keeps some compatibility or wrapping
 class AgentFault(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     fault_type: Literal["SCHEMA_ERROR", "TIMEOUT", "RATE_LIMIT", "SYSTEM_ERROR"]
     agent: str
     step_id: str
@@ -52,12 +56,16 @@ class AgentFault(BaseModel):
 
 class IntelligenceSignal(BaseModel):
     """Fallback for schema-invalid but semantically useful output."""
+    model_config = ConfigDict(frozen=True)
+
     source_agent: str
     summary_points: List[str] = Field(..., max_length=3)
     confidence: float
     inferred_risk_delta: int = Field(..., ge=-2, le=2)
 
 class SpecialistDecision(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     agent: str
     decision: Optional[Decision] = None
     fault: Optional[AgentFault] = None
@@ -66,7 +74,20 @@ class SpecialistDecision(BaseModel):
     raw_output: Optional[Dict[str, Any]] = None # For debugging/logging
     meta: Dict[str, Any] = Field(default_factory=dict)
 
+    @property
+    def kind(self) -> Optional[Literal["decision", "signal", "fault"]]:
+        """Which payload this result carries; producers set exactly one."""
+        if self.decision is not None:
+            return "decision"
+        if self.signal is not None:
+            return "signal"
+        if self.fault is not None:
+            return "fault"
+        return None
+
 class CompositeDecision(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     primary_decision: Decision
     conflicts: List[str] = Field(default_factory=list)
     consensus_score: float
@@ -74,30 +95,38 @@ class CompositeDecision(BaseModel):
 
 # --- Plan ---
 
-class PlanStep(BaseModel):
+# Plan steps and simulation turns are internal, high-churn records, so they
+# are slotted dataclasses. Pydantic still validates them when they appear as
+# fields of a model (ExecutionPlan, SimulationResult).
+@dataclass(frozen=True, slots=True)
+class PlanStep:
     step_id: str
     agent: str
     objective: str
     priority: int = 1
 
 class ExecutionPlan(BaseModel):
-    plan_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    model_config = ConfigDict(frozen=True)
+
+    plan_id: str = Field(default_factory=lambda: uuid.uuid4().hex)
     steps: List[PlanStep]
     context: Dict[str, Any] = Field(default_factory=dict)
 
 # --- Simulation ---
 
-class ValidationResult(BaseModel):
+@dataclass(frozen=True, slots=True)
+class ValidationResult:
     valid: bool
     violation: Optional[str] = None
 
-class SimulationTurn(BaseModel):
+@dataclass(slots=True)
+class SimulationTurn:
     turn: int
     actor: str
     action: str
     outcome: str
     validation: ValidationResult
-    meta: Dict[str, Any] = Field(default_factory=dict)
+    meta: Dict[str, Any] = field(default_factory=dict)
 
 class ConstraintResult(BaseModel):
     is_safe: bool
@@ -118,8 +147,22 @@ class JudgmentResult(BaseModel):
     final_decision: Optional[Decision] = None
     meta: Dict[str, Any] = Field(default_factory=dict)
 
+class SimulationScenario(BaseModel):
+    name: str
+    assumptions: List[str] = Field(default_factory=list)
+    expected_behaviour: Dict[str, str] = Field(default_factory=dict)
+    qualitative_payoffs: Dict[str, str] = Field(default_factory=dict)
+    stability_assessment: str = ""
+
+class SimulationAnalysis(BaseModel):
+    """Reply shape the simulation agent asks the model for."""
+    scenarios: List[SimulationScenario]
+    comparison_summary: str = ""
+    recommended_strategy_for_A: List[str] = Field(default_factory=list)
+    key_risks_and_contingencies: List[str] = Field(default_factory=list)
+
 class SimulationResult(BaseModel):
-    simulation_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    simulation_id: str = Field(default_factory=lambda: uuid.uuid4().hex)
     final_state: Dict[str, Any]
     outcome: str
     stability_score: float = Field(..., ge=0, le=1)
@@ -138,5 +181,11 @@ class FinalReport(BaseModel):
     timestamps: Dict[str, str]
 
 # Helper for validation
-def validate_schema(data: Any, schema_model: BaseModel):
-    return schema_model.model_validate(data)
+@lru_cache(maxsize=128)
+def _adapter_for(schema_model: Any) -> TypeAdapter:
+    # Building an adapter compiles a validator; reuse one per type
+    return TypeAdapter(schema_model)
+
+def validate_schema(data: Any, schema_model: Any):
+    """Validates `data` against a model or dataclass type."""
+    return _adapter_for(schema_model).validate_python(data)
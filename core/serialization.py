@@ -0,0 +1,49 @@
+"""
+JSON helpers for embedding structured payloads into prompts.
+"""
+from typing import Any
+import orjson
+
+def _default(obj: Any) -> Any:
+    # Pydantic models are passed around between nodes; dump them on demand.
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+def to_json(obj: Any) -> str:
+    """Compact JSON for prompt interpolation (dicts, lists or Pydantic models)."""
+    return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS).decode()
+
+def canonical_json(obj: Any) -> str:
+    """Like `to_json`, with sorted keys so equal payloads render identically."""
+    return orjson.dumps(obj, default=_default, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS).decode()
+
+# Per-run bookkeeping that never changes the analysis but would make every
+# prompt prefix unique.
+_VOLATILE_CONTEXT_KEYS = frozenset({"ts", "timestamp", "request_id", "run_id", "trace_id"})
+
+def context_json(context: Any) -> str:
+    """
+    Canonical JSON for a scenario context: sorted keys and volatile top-level
+    fields dropped, so equal scenarios render byte-identical prompt text.
+    """
+    if isinstance(context, dict):
+        context = {k: v for k, v in context.items() if k not in _VOLATILE_CONTEXT_KEYS}
+    return canonical_json(context)
+
+# CompositeDecision fields that serve the UI or debugging only. Thought traces
+# are sampled text, so keeping them would also change the prompt every run.
+_COMPOSITE_PROMPT_EXCLUDE = {
+    "primary_decision": {"meta"},
+    "specialist_decisions": {
+        "__all__": {"thought_trace": True, "raw_output": True, "meta": True, "decision": {"meta"}}
+    },
+}
+
+def composite_prompt_json(comp: Any) -> str:
+    """Compact JSON of a CompositeDecision as the constraint and judgment prompts need it."""
+    if not hasattr(comp, "model_dump"):
+        return to_json(comp)
+    return orjson.dumps(
+        comp.model_dump(mode="json", exclude_none=True, exclude=_COMPOSITE_PROMPT_EXCLUDE)
+    ).decode()
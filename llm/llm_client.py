@@ -1,14 +1,28 @@
 import os
-import json
+import re
+import random
 import logging
-import hashlib
 import asyncio
-from typing import Any, Dict, Optional, List, Union
-from groq import AsyncGroq, GroqError
-from dotenv import load_dotenv
+import weakref
+import threading
+import time
+import importlib.util
+import concurrent.futures
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Callable, Dict, Optional, List, Tuple, Type, Union
+import orjson
+import xxhash
+from pydantic import BaseModel, ValidationError
+from core.llm_rate_limiter import AsyncTokenBucket, estimate_tokens
+from core.response_cache import ResponseCache
 
-# Load environment variables
-load_dotenv()
+# Load environment variables. Entrypoints (scripts/run_server.py, ui/app.py)
+# load .env before importing us, and containers inject the key directly; only
+# walk up for a .env file when the key is still missing.
+if not os.environ.get("GROQ_API_KEY"):
+    from dotenv import load_dotenv
+    load_dotenv()
 
 logger = logging.getLogger("llm_client")
 
@@ -20,6 +34,190 @@ MODEL_FAST = "openai/gpt-oss-20b"        # High Speed
 FLASH_MAX_OUTPUT = 1024
 PRO_MAX_OUTPUT = 4096
 
+# The groq SDK (and the httpx stack under it) is imported when the first
+# LLMClient is built, so importing this module for its constants stays cheap.
+AsyncGroq: Any = None
+DefaultAsyncHttpxClient: Any = None
+GroqError: Any = None
+
+def _load_groq() -> None:
+    global AsyncGroq, DefaultAsyncHttpxClient, GroqError
+    if GroqError is not None:
+        return
+    import groq
+    AsyncGroq = groq.AsyncGroq
+    DefaultAsyncHttpxClient = groq.DefaultAsyncHttpxClient
+    GroqError = groq.GroqError
+
+# Retry sleeps grow as 2**attempt up to this cap, plus up to a second of
+# jitter so concurrent callers do not retry in lockstep
+RETRY_BACKOFF_CAP = 30.0
+
+# Short names accepted in place of full model ids
+_MODEL_ALIASES = {"gptss120b": MODEL_REASONING}
+
+# Request option that never varies between calls
+_JSON_OBJECT_FORMAT = {"type": "json_object"}
+
+# Models that accept `response_format={"type": "json_schema", ...}`. For these
+# the schema rides in the request options instead of the prompt text.
+_SCHEMA_MODE_MODELS = frozenset({
+    MODEL_REASONING,
+    MODEL_FAST,
+    "meta-llama/llama-4-maverick-17b-128e-instruct",
+    "meta-llama/llama-4-scout-17b-16e-instruct",
+    "moonshotai/kimi-k2-instruct",
+})
+
+@lru_cache(maxsize=16)
+def _output_limit(model: str) -> int:
+    """Output budget by lineage: "Flash" (8b) or "Pro" (everything larger)."""
+    return FLASH_MAX_OUTPUT if "8b" in model else PRO_MAX_OUTPUT
+
+# Client-side admission defaults, overridable via LLM_MAX_RPS / LLM_MAX_TPM /
+# LLM_MAX_CONCURRENCY. Keeping bursts under the account quota avoids 429s.
+DEFAULT_MAX_RPS = 10.0
+DEFAULT_MAX_TPM = 250_000
+DEFAULT_MAX_CONCURRENCY = 8
+
+# generate() results kept in memory ahead of the disk cache (LLM_MEM_CACHE_SIZE)
+DEFAULT_MEM_CACHE_SIZE = 512
+
+# On-disk cache budget (LLM_DISK_CACHE_BYTES) and optional entry lifetime in
+# seconds (LLM_DISK_CACHE_TTL, off by default). Writers trigger a sweep at most
+# once per interval; it drops expired entries, then least recently used ones.
+DEFAULT_DISK_CACHE_BYTES = 2 * 1024 ** 3
+CACHE_SWEEP_INTERVAL = 300.0
+
+# With the optional `h2` package, concurrent calls on a loop (the specialist
+# fan-out) are multiplexed over one connection instead of opening one each.
+_HTTP2 = importlib.util.find_spec("h2") is not None
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        value = float(os.environ.get(name, default))
+    except (TypeError, ValueError):
+        return default
+    return value if value > 0 else default
+
+# --- Response Validation ---
+# Compiled validators keyed by id(schema). Agents pass module-level schema
+# dicts, so each schema is compiled once per process. The schema object is
+# stored next to its validator to pin the id against reuse after GC.
+_VALIDATOR_CACHE: Dict[int, Tuple[Dict[str, Any], Callable[[Any], List[str]]]] = {}
+_VALIDATOR_CACHE_MAX = 128
+
+def _compile_validator(schema: Dict[str, Any]) -> Callable[[Any], List[str]]:
+    """Builds a cheap top-level check: the payload is an object carrying every required field."""
+    required = tuple(schema.get("required", ()))
+
+    def validate(data: Any) -> List[str]:
+        if not isinstance(data, dict):
+            return [f"expected object, got {type(data).__name__}"]
+        return [f"missing field '{k}'" for k in required if k not in data]
+
+    return validate
+
+def get_validator(schema: Dict[str, Any]) -> Callable[[Any], List[str]]:
+    entry = _VALIDATOR_CACHE.get(id(schema))
+    if entry is None or entry[0] is not schema:
+        if len(_VALIDATOR_CACHE) >= _VALIDATOR_CACHE_MAX:
+            _VALIDATOR_CACHE.clear()
+        entry = (schema, _compile_validator(schema))
+        _VALIDATOR_CACHE[id(schema)] = entry
+    return entry[1]
+
+def _prompt_schema(node: Any, top: bool = True) -> Any:
+    """
+    Copy of a JSON schema without the per-field "title" entries pydantic
+    generates ("risk_score" -> "Risk Score"). They repeat the property names
+    and add prompt tokens on every call. The root title is kept.
+    """
+    if isinstance(node, list):
+        return [_prompt_schema(v, False) for v in node]
+    if not isinstance(node, dict):
+        return node
+    out = {}
+    for k, v in node.items():
+        if k == "title" and not top:
+            continue
+        if k in ("properties", "$defs"):
+            # Keys here are field / definition names, not schema keywords
+            out[k] = {name: _prompt_schema(sub, False) for name, sub in v.items()}
+        else:
+            out[k] = _prompt_schema(v, False)
+    return out
+
+# Serialized schemas for the system message, keyed like the validators so a
+# module-level schema dict is dumped once per process.
+_SCHEMA_JSON_CACHE: Dict[int, Tuple[Dict[str, Any], str]] = {}
+
+def get_schema_json(schema: Dict[str, Any]) -> str:
+    entry = _SCHEMA_JSON_CACHE.get(id(schema))
+    if entry is None or entry[0] is not schema:
+        if len(_SCHEMA_JSON_CACHE) >= _VALIDATOR_CACHE_MAX:
+            _SCHEMA_JSON_CACHE.clear()
+        entry = (schema, orjson.dumps(_prompt_schema(schema), option=orjson.OPT_SORT_KEYS).decode())
+        _SCHEMA_JSON_CACHE[id(schema)] = entry
+    return entry[1]
+
+def _extract_json(text: str) -> str:
+    """
+    Returns the JSON payload from a reply that may wrap it in a markdown
+    fence or surround it with prose. Plain index scans, no regex: the body of
+    the first ``` / ```json fence (an unterminated fence runs to the end),
+    then the outermost brackets if text is left around them.
+    """
+    text = text.strip()
+    # Usual case: the reply is already bare JSON. Returning here also keeps a
+    # ``` inside a string value from being taken for a fence.
+    if text[:1] in ("{", "[") and text[-1:] in ("}", "]"):
+        return text
+    fence = text.find("```")
+    if fence != -1:
+        start = fence + 3
+        if text.startswith("json", start):
+            start += 4
+        end = text.find("```", start)
+        text = text[start:end] if end != -1 else text[start:]
+    text = text.strip()
+    if text[:1] in ("{", "["):
+        return text
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        return text
+    start = min(starts)
+    end = max(text.rfind("}"), text.rfind("]"))
+    return text[start:end + 1] if end > start else text
+
+# json_schema response formats, cached per schema object like the JSON above
+_RESPONSE_FORMAT_CACHE: Dict[int, Tuple[Dict[str, Any], Dict[str, Any]]] = {}
+
+def get_response_format(schema: Dict[str, Any]) -> Dict[str, Any]:
+    entry = _RESPONSE_FORMAT_CACHE.get(id(schema))
+    if entry is None or entry[0] is not schema:
+        if len(_RESPONSE_FORMAT_CACHE) >= _VALIDATOR_CACHE_MAX:
+            _RESPONSE_FORMAT_CACHE.clear()
+        name = re.sub(r"[^A-Za-z0-9_-]", "_", str(schema.get("title", "response")))
+        entry = (schema, {"type": "json_schema", "json_schema": {"name": name, "schema": _prompt_schema(schema)}})
+        _RESPONSE_FORMAT_CACHE[id(schema)] = entry
+    return entry[1]
+
+_SCHEMA_MODE_INSTRUCTION = "You MUST respond with ONLY a single JSON object that matches the response schema. No markdown, no explanation."
+
+_JSON_INSTRUCTION = "You MUST respond with ONLY valid JSON. No markdown, no explanation, no code blocks. Output a single JSON object that strictly matches the provided schema."
+
+@lru_cache(maxsize=64)
+def _structured_system_content(schema_mode: bool, schema_json: str, system_prompt: Optional[str]) -> str:
+    """System message for a structured call; built once per agent prompt and schema."""
+    if schema_mode:
+        content = _SCHEMA_MODE_INSTRUCTION
+    else:
+        content = f"{_JSON_INSTRUCTION}\n\nSchema:\n{schema_json}"
+    if system_prompt:
+        content = f"{content}\n\n{system_prompt}"
+    return content
+
 class LLMClient:
     """
     Groq-Based Production LLM Client (v0.2.1).
@@ -30,87 +228,286 @@ class LLMClient:
 
     def __init__(self, project_id: Optional[str] = None, location: Optional[str] = None):
         """Analyze environment for Groq."""
+        _load_groq()
         self.api_key = os.environ.get("GROQ_API_KEY")
         
         if not self.api_key:
              logger.warning("GROQ_API_KEY not found.")
              
-        self.client = AsyncGroq(api_key=self.api_key)
+        # One AsyncGroq per event loop, created on first use (see `client`)
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, AsyncGroq]" = weakref.WeakKeyDictionary()
+
+        # Optional local routing: models listed in LOCAL_LLM_MODELS go to an
+        # OpenAI-compatible server (vLLM / Ollama) at LOCAL_LLM_BASE_URL, where
+        # concurrent specialist calls share continuous-batched forward passes.
+        self.local_base_url = os.environ.get("LOCAL_LLM_BASE_URL", "").rstrip("/")
+        self.local_models = frozenset(
+            m.strip() for m in os.environ.get("LOCAL_LLM_MODELS", "").split(",") if m.strip()
+        ) if self.local_base_url else frozenset()
+        self._local_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+        # Shared rate budget plus a per-loop cap on in-flight requests
+        self.rate_limiter = AsyncTokenBucket(
+            rps=_env_number("LLM_MAX_RPS", DEFAULT_MAX_RPS),
+            tpm=_env_number("LLM_MAX_TPM", DEFAULT_MAX_TPM)
+        )
+        self.max_concurrency = int(_env_number("LLM_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY))
+        self._inflight: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
         
+        # Validated structured replies, keyed on the exact request
+        self.response_cache = ResponseCache()
+        # Recent generate() results by disk-cache key, so repeats skip file I/O
+        self._mem_cache = ResponseCache(maxsize=int(_env_number("LLM_MEM_CACHE_SIZE", DEFAULT_MEM_CACHE_SIZE)))
+
         # Cache setup
-        self.cache_dir = os.path.join(os.getcwd(), "cache")
-        os.makedirs(self.cache_dir, exist_ok=True)
+        # Created with the first shard directory, not up front
+        self.cache_dir = os.environ.get("LLM_CACHE_DIR") or os.path.join(os.getcwd(), "cache")
+        # Cache files go through their own small pool so disk I/O does not
+        # queue behind other users of the loop's default executor
+        self._io_pool = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix="llm-cache")
+        # Disk writes run as background tasks; references are held until done
+        self._pending_writes: set = set()
+        # Shard directories known to exist, so writes skip the makedirs call
+        self._shard_dirs: set = set()
+        self._max_cache_bytes = int(_env_number("LLM_DISK_CACHE_BYTES", DEFAULT_DISK_CACHE_BYTES))
+        ttl = _env_number("LLM_DISK_CACHE_TTL", 0)
+        self._cache_ttl: Optional[float] = ttl or None
+        self._next_sweep = 0.0
+        # Writes run on _io_pool threads; guards _shard_dirs and _next_sweep
+        self._write_state_lock = threading.Lock()
 
-    def _get_cache_key(self, prompt: str, model: str, params: Dict) -> str:
-        blob = json.dumps({"prompt": prompt, "model": model, "params": params}, sort_keys=True)
-        return hashlib.sha256(blob.encode()).hexdigest()
+    def close(self) -> None:
+        """Releases the cache I/O threads; pending writes still complete."""
+        self._io_pool.shutdown(wait=False)
 
-    async def _read_cache(self, key: str) -> Optional[Dict]:
-        path = os.path.join(self.cache_dir, f"{key}.json")
-        if os.path.exists(path):
-            try:
-                loop = asyncio.get_running_loop()
-                return await loop.run_in_executor(None, self._read_json_file, path)
-            except Exception:
-                return None
-        return None
+    async def flush(self) -> None:
+        """Waits for the background cache writes started on the running loop."""
+        loop = asyncio.get_running_loop()
+        pending = [t for t in self._pending_writes if t.get_loop() is loop]
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    @property
+    def client(self) -> "AsyncGroq":
+        """
+        AsyncGroq bound to the running event loop. Its httpx pool cannot outlive
+        the loop that opened it, and runs are driven by separate asyncio.run()
+        calls, so a shared LLMClient keeps one connection pool per loop.
+        """
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = AsyncGroq(api_key=self.api_key, http_client=DefaultAsyncHttpxClient(http2=_HTTP2))
+            self._clients[loop] = client
+        return client
 
-    def _read_json_file(self, path: str) -> Dict:
-        with open(path, "r") as f:
-            return json.load(f)
+    @property
+    def local_client(self) -> "httpx.AsyncClient":
+        """Per-loop HTTP client for the local OpenAI-compatible endpoint."""
+        loop = asyncio.get_running_loop()
+        client = self._local_clients.get(loop)
+        if client is None:
+            import httpx
+            client = httpx.AsyncClient(base_url=self.local_base_url, timeout=60.0, http2=_HTTP2)
+            self._local_clients[loop] = client
+        return client
+
+    @property
+    def inflight(self) -> asyncio.Semaphore:
+        """Caps concurrent requests on the running loop (semaphores are loop-bound)."""
+        loop = asyncio.get_running_loop()
+        sem = self._inflight.get(loop)
+        if sem is None:
+            sem = asyncio.Semaphore(self.max_concurrency)
+            self._inflight[loop] = sem
+        return sem
+
+    async def _admit(self, kwargs: Dict[str, Any]):
+        """Waits for rate budget, then returns the in-flight slot to hold for the request."""
+        await self.rate_limiter.acquire(
+            estimate_tokens(kwargs["messages"], kwargs.get("max_completion_tokens"))
+        )
+        return self.inflight
+
+    async def _chat(self, **kwargs) -> Any:
+        """Routes a chat completion to the local endpoint or to Groq."""
+        slot = await self._admit(kwargs)
+        if kwargs["model"] not in self.local_models:
+            async with slot:
+                return await self.client.chat.completions.create(**kwargs)
+
+        # OpenAI-compatible servers take `max_tokens`; drop unset options
+        body = {k: v for k, v in kwargs.items() if v is not None}
+        body["max_tokens"] = body.pop("max_completion_tokens", None)
+        async with slot:
+            resp = await self.local_client.post("/chat/completions", json=body)
+        resp.raise_for_status()
+        # Mirror the SDK response shape read by callers
+        return SimpleNamespace(choices=[
+            SimpleNamespace(
+                finish_reason=c.get("finish_reason"),
+                message=SimpleNamespace(content=c["message"]["content"])
+            )
+            for c in resp.json()["choices"]
+        ])
+
+    def _get_cache_key(self, prompt: str, model: str, max_tokens: int, temperature: float,
+                       seed: Optional[int], system_prompt: Optional[str]) -> str:
+        """
+        The request has a fixed shape, so its fields are joined into one
+        header and hashed with the prompt in two updates; no params dict or
+        JSON encoding. The system prompt's length goes in the header so its
+        text cannot run into the prompt's.
+        """
+        # XXH3-128 is a non-cryptographic hash several times faster than
+        # BLAKE2b on prompt-sized input; collisions here are not a security issue
+        h = xxhash.xxh3_128()
+        system = system_prompt or ""
+        sys_len = len(system) if system_prompt is not None else -1
+        h.update(f"{model}\x1f{max_tokens}\x1f{temperature!r}\x1f{seed}\x1f{sys_len}\x1f{system}".encode())
+        h.update(prompt.encode())
+        return h.hexdigest()
+
+    def _cache_path(self, key: str) -> str:
+        """Entries are sharded by the first key byte so no directory grows unbounded."""
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+
+    async def _read_cache(self, key: str, max_age: Optional[float] = None) -> Optional[Dict]:
+        """Entry stored under `key`; with `max_age` (seconds), older entries count as misses."""
+        path = self._cache_path(key)
+        # Open directly rather than stat first; a miss costs one failed open
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._io_pool, self._read_json_file, path, max_age)
+        except (OSError, orjson.JSONDecodeError):
+            # Missing, unreadable or half-written entries are misses
+            return None
+
+    def _read_json_file(self, path: str, max_age: Optional[float] = None) -> Optional[Dict]:
+        with open(path, "rb") as f:
+            if max_age is not None and time.time() - os.fstat(f.fileno()).st_mtime > max_age:
+                return None
+            return orjson.loads(f.read())
 
     async def _write_cache(self, key: str, data: Dict):
-        path = os.path.join(self.cache_dir, f"{key}.json")
+        path = self._cache_path(key)
         try:
             loop = asyncio.get_running_loop()
-            await loop.run_in_executor(None, self._write_json_file, path, data)
+            await loop.run_in_executor(self._io_pool, self._write_json_file, path, data)
         except Exception as e:
             logger.warning(f"Failed to write cache: {e}")
 
+    def _write_behind(self, key: str, data: Dict) -> None:
+        """Starts a background disk write; `flush` waits for it."""
+        task = asyncio.create_task(self._write_cache(key, data))
+        self._pending_writes.add(task)
+        task.add_done_callback(self._pending_writes.discard)
+
     def _write_json_file(self, path: str, data: Dict):
+        # Shard directories are created on first write to them
+        shard = os.path.dirname(path)
+        with self._write_state_lock:
+            if shard not in self._shard_dirs:
+                os.makedirs(shard, exist_ok=True)
+                self._shard_dirs.add(shard)
         tmp_path = path + ".tmp"
-        with open(tmp_path, "w") as f:
-            json.dump(data, f)
+        with open(tmp_path, "wb") as f:
+            f.write(orjson.dumps(data))
         os.replace(tmp_path, path)
+        now = time.monotonic()
+        # Only the thread that claims the slot sweeps; the sweep runs unlocked
+        with self._write_state_lock:
+            sweep = now >= self._next_sweep
+            if sweep:
+                self._next_sweep = now + CACHE_SWEEP_INTERVAL
+        if sweep:
+            # The entry is already written; a failed sweep is reported on its own
+            try:
+                self._sweep_cache()
+            except OSError as e:
+                logger.warning(f"Cache sweep failed: {e}")
 
-    async def generate(self, 
-                     prompt: str, 
-                     model: str = MODEL_FAST, 
-                     *, 
-                     max_tokens: int = None, 
-                     temperature: float = 0.7, 
-                     seed: Optional[int] = None) -> Dict[str, Any]:
+    def _sweep_cache(self) -> int:
         """
-        Groq Generation Logic.
+        Deletes expired entries, then the least recently read ones (by atime)
+        until the cache fits `_max_cache_bytes`. `.tmp` files older than a
+        sweep interval are left over from interrupted writes and always go.
+        Returns the number removed.
         """
-        # Alias handling for user convenience (if needed), otherwise strict
-        if model == "gptss120b": model = MODEL_REASONING
-        
-        # Enforce Token Limits based on "Flash" (8b) or "Pro" (70b) lineage
-        if "8b" in model:
-             limit = FLASH_MAX_OUTPUT
-        else:
-             limit = PRO_MAX_OUTPUT
-             
-        if max_tokens:
-            max_tokens = min(max_tokens, limit)
-        else:
-            max_tokens = limit
+        entries = []
+        orphans = []
+        total = 0
+        stale_tmp_before = time.time() - CACHE_SWEEP_INTERVAL
+        with os.scandir(self.cache_dir) as shards:
+            for shard in shards:
+                if not shard.is_dir():
+                    continue
+                with os.scandir(shard.path) as files:
+                    for f in files:
+                        is_tmp = f.name.endswith(".tmp")
+                        if not (is_tmp or f.name.endswith(".json")):
+                            continue
+                        try:
+                            st = f.stat()
+                        except FileNotFoundError:
+                            continue
+                        if is_tmp:
+                            if st.st_mtime < stale_tmp_before:
+                                orphans.append(f.path)
+                            continue
+                        entries.append((st.st_atime, st.st_mtime, st.st_size, f.path))
+                        total += st.st_size
 
-        params = {"max_tokens": max_tokens, "temperature": temperature, "seed": seed}
-        cache_key = self._get_cache_key(prompt, model, params)
-        
-        # Check cache
-        cached = await self._read_cache(cache_key)
-        if cached:
-            cached["meta"]["cached"] = True
-            return cached
+        removed = 0
+        for path in orphans:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                continue
+            removed += 1
+        expired_before = time.time() - self._cache_ttl if self._cache_ttl else None
+        entries.sort()
+        for atime, mtime, size, path in entries:
+            if total <= self._max_cache_bytes and (expired_before is None or mtime >= expired_before):
+                continue
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed += 1
+        return removed
 
+    def _prepare(self, prompt: str, model: str, max_tokens: Optional[int], temperature: float,
+                 seed: Optional[int], system_prompt: Optional[str]) -> Tuple[str, int, str]:
+        """Resolves the model alias and output cap, and derives the cache key."""
+        model = _MODEL_ALIASES.get(model, model)
+        limit = _output_limit(model)
+        max_tokens = min(max_tokens, limit) if max_tokens else limit
+        return model, max_tokens, self._get_cache_key(prompt, model, max_tokens, temperature, seed, system_prompt)
+
+    async def _lookup(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Checks memory, then disk; a hit is returned as a copy marked cached."""
+        cached = self._mem_cache.get(cache_key)
+        if cached is None:
+            cached = await self._read_cache(cache_key)
+            if not cached:
+                return None
+            self._mem_cache.put(cache_key, cached)
+        return {**cached, "meta": {**cached["meta"], "cached": True}}
+
+    async def _generate_uncached(self, cache_key: str, prompt: str, model: str, max_tokens: int,
+                                 temperature: float, seed: Optional[int],
+                                 system_prompt: Optional[str]) -> Dict[str, Any]:
+        """One API round-trip; the result is stored under `cache_key`."""
         try:
             # Groq API Call
+            messages = [{"role": "user", "content": prompt}]
+            if system_prompt:
+                messages.insert(0, {"role": "system", "content": system_prompt})
             kwargs = {
                 "model": model,
-                "messages": [{"role": "user", "content": prompt}],
+                "messages": messages,
                 "temperature": temperature,
                 "max_completion_tokens": max_tokens,
                 "stream": False
@@ -118,7 +515,7 @@ class LLMClient:
             if seed is not None:
                 kwargs["seed"] = seed
                 
-            response = await self.client.chat.completions.create(**kwargs)
+            response = await self._chat(**kwargs)
             
             # Finish Reason Handling
             choice = response.choices[0]
@@ -142,27 +539,108 @@ class LLMClient:
                 "meta": meta
             }
             
-            await self._write_cache(cache_key, result)
-            return result
+            # The memory tier answers repeats at once; the disk copy is
+            # written in the background rather than on the caller's time
+            self._mem_cache.put(cache_key, result)
+            self._write_behind(cache_key, result)
+            return {**result, "meta": {**result["meta"]}}
             
         except Exception as e:
             logger.error(f"Groq Generate Error: {e}")
             raise e
 
-    async def generate_with_retries(self, 
+    async def generate(self, 
+                     prompt: str, 
+                     model: str = MODEL_FAST, 
+                     *, 
+                     max_tokens: int = None, 
+                     temperature: float = 0.7, 
+                     seed: Optional[int] = None,
+                     system_prompt: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Groq Generation Logic.
+        A static `system_prompt` is sent as its own leading message so the
+        provider's prefix cache can reuse it across calls.
+        """
+        model, max_tokens, cache_key = self._prepare(prompt, model, max_tokens, temperature, seed, system_prompt)
+        cached = await self._lookup(cache_key)
+        if cached is not None:
+            return cached
+        return await self._generate_uncached(cache_key, prompt, model, max_tokens, temperature, seed, system_prompt)
+
+    async def generate_text_stream(self,
+                                   prompt: str,
+                                   model: str = MODEL_REASONING,
+                                   *,
+                                   max_tokens: int = None,
+                                   temperature: float = 0.7,
+                                   system_prompt: Optional[str] = None) -> AsyncIterator[str]:
+        """
+        Yields completion text as it is decoded.
+        Streamed output is not written to the response cache.
+        """
+        model = _MODEL_ALIASES.get(model, model)
+        limit = _output_limit(model)
+        max_tokens = min(max_tokens, limit) if max_tokens else limit
+
+        messages = [{"role": "user", "content": prompt}]
+        if system_prompt:
+            messages.insert(0, {"role": "system", "content": system_prompt})
+        kwargs = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_completion_tokens": max_tokens,
+        }
+
+        # The local endpoint is reached over plain HTTP without SSE parsing,
+        # so it yields the full completion as a single chunk.
+        if model in self.local_models:
+            response = await self._chat(stream=False, **kwargs)
+            text = response.choices[0].message.content
+            if text:
+                yield text
+            return
+
+        slot = await self._admit(kwargs)
+        async with slot:
+            stream = await self.client.chat.completions.create(stream=True, **kwargs)
+            try:
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta.content
+                    if delta:
+                        yield delta
+            finally:
+                # A consumer that stops early (closed or cancelled) drops the
+                # connection so the provider stops decoding the remainder
+                await stream.close()
+
+    async def generate_with_retries(self,
                                   prompt: str, 
                                   model: str = MODEL_FAST, 
                                   retries: int = 2,
                                   timeout: float = 60.0,
-                                  **kwargs) -> Dict[str, Any]:
+                                  *,
+                                  max_tokens: int = None,
+                                  temperature: float = 0.7,
+                                  seed: Optional[int] = None,
+                                  system_prompt: Optional[str] = None) -> Dict[str, Any]:
         """
         Retries on API/Network errors.
+        The cache is consulted once up front; only the API call is retried.
         """
+        model, max_tokens, cache_key = self._prepare(prompt, model, max_tokens, temperature, seed, system_prompt)
+        cached = await self._lookup(cache_key)
+        if cached is not None:
+            return cached
+
         last_exception = None
         for attempt in range(retries + 1):
             try:
                 result = await asyncio.wait_for(
-                    self.generate(prompt, model=model, **kwargs),
+                    self._generate_uncached(cache_key, prompt, model, max_tokens, temperature, seed, system_prompt),
                     timeout=timeout
                 )
                 return result
@@ -175,7 +653,7 @@ class LLMClient:
                 logger.warning(f"Unexpected error on {model} (Attempt {attempt+1}): {e}")
                 
             if attempt < retries:
-                 await asyncio.sleep(2 ** attempt)
+                 await asyncio.sleep(min(2 ** attempt, RETRY_BACKOFF_CAP) + random.uniform(0, 1))
 
         raise last_exception or RuntimeError("All retries failed")
 
@@ -183,53 +661,99 @@ class LLMClient:
                                        prompt: str, 
                                        response_schema: Dict[str, Any],
                                        model: str = MODEL_REASONING, 
-                                       **kwargs) -> Dict[str, Any]:
+                                       system_prompt: Optional[str] = None,
+                                       response_model: Optional[Type[BaseModel]] = None,
+                                       persist: bool = False,
+                                       persist_ttl: Optional[float] = None,
+                                       **kwargs) -> Union[Dict[str, Any], BaseModel]:
         """
         Generates JSON using Groq's JSON mode.
+        Models in `_SCHEMA_MODE_MODELS` get the schema as a json_schema
+        response format; others get it spelled out in the system message.
+        Static instructions belong in `system_prompt` and the per-call payload in
+        `prompt`, so the message prefix stays byte-identical across calls and
+        hits the provider's prefix cache.
+        With `response_model`, the reply is validated straight from the raw text
+        and the model instance is returned instead of a dict.
+        Replies that pass validation are kept in `response_cache`, so an
+        identical request is answered without a round-trip. For a frozen
+        `response_model` the validated instance is kept and each hit gets a
+        deep copy of it rather than a re-validation: frozen only blocks field
+        assignment, the list and dict fields inside are still mutable. With `persist`, validated replies are
+        also written to the disk cache, so identical requests from later
+        processes skip the round-trip too; `persist_ttl` (seconds) bounds how
+        old a disk entry may be and still be reused.
         """
-        # Auto-upgrade purely 8b models if we suspect they might struggle, 
-        # but User asked for strict Llama usage. 
-        # Llama 3.1 8b is okay at JSON but 70b is better.
-        # We'll default to 70b (MODEL_REASONING) but allow override.
-        
-        full_prompt = (
-            f"{prompt}\n\n"
-            f"IMPORTANT: Respond with VALID JSON only. matching this schema:\n"
-            f"{json.dumps(response_schema, indent=2)}"
+        # Instruction, schema and agent prompt are all static per agent, so the
+        # whole system message is a reusable prefix; only `prompt` varies.
+        schema_json = get_schema_json(response_schema)
+        schema_mode = model in _SCHEMA_MODE_MODELS
+        response_format = get_response_format(response_schema) if schema_mode else _JSON_OBJECT_FORMAT
+        system_content = _structured_system_content(schema_mode, schema_json, system_prompt)
+
+        user_content = f"Task: {prompt}"
+        temperature = kwargs.get("temperature", 0.1)
+        # Structured payloads are small; callers size this to their schema
+        max_tokens = kwargs.get("max_tokens", FLASH_MAX_OUTPUT)
+        keep_instance = response_model is not None and response_model.model_config.get("frozen", False)
+        cache_key = ResponseCache.make_key(
+            model, schema_json, system_content, user_content, str(temperature), str(max_tokens),
+            response_model.__qualname__ if keep_instance else ""
         )
-        
+
         try:
-             response = await self.client.chat.completions.create(
-                 model=model,
-             messages=[
-                     {"role": "system", "content": "You MUST respond with ONLY valid JSON. No markdown, no explanation, no code blocks. Output a single JSON object that strictly matches the provided schema."},
-                     {"role": "user", "content": f"Generate JSON matching this schema:\n{json.dumps(response_schema)}\n\nTask: {prompt}"}
-                 ],
-                 temperature=0.1,
-                 # "json_object" is flaky on GPT OSS via Groq API (400 errors)
-                 # We disable it for these models and rely on prompt engineering + retry
-                 response_format=None if "gpt-oss" in model else {"type": "json_object"},
-                 stream=False,
-                 max_completion_tokens=kwargs.get("max_tokens", 4096)
-             )
-             text_response = response.choices[0].message.content
-             
-             # Robust cleaning helper
-             def clean_json_markdown(text):
-                 if "```json" in text:
-                     text = text.split("```json")[1]
-                     if "```" in text:
-                         text = text.split("```")[0]
-                 elif "```" in text:
-                     text = text.split("```")[1].split("```")[0]
-                 return text.strip()
+             cached = self.response_cache.get(cache_key)
+             if keep_instance and cached is not None:
+                 return cached.model_copy(deep=True)
+             clean_text = cached
+             if clean_text is None and persist:
+                 entry = await self._read_cache(cache_key.hex(), persist_ttl)
+                 if entry:
+                     clean_text = entry.get("text")
+             fresh = clean_text is None
+             if clean_text is not None:
+                 text_response = clean_text
+             else:
+                 response = await self._chat(
+                     model=model,
+                     messages=[
+                         {"role": "system", "content": system_content},
+                         {"role": "user", "content": user_content}
+                     ],
+                     temperature=temperature,
+                     response_format=response_format,
+                     stream=False,
+                     max_completion_tokens=max_tokens
+                 )
+                 text_response = response.choices[0].message.content
+                 clean_text = _extract_json(text_response)
+
+             if response_model is not None:
+                 # Single pass: parse and validate without an intermediate dict
+                 try:
+                     result = response_model.model_validate_json(clean_text)
+                     self.response_cache.put(cache_key, result.model_copy(deep=True) if keep_instance else clean_text)
+                     if persist and fresh:
+                         self._write_behind(cache_key.hex(), {"text": clean_text})
+                     return result
+                 except ValidationError as e:
+                     logger.error(f"Schema Validation Error: {e.error_count()} errors. Raw: {text_response[:500]}...")
+                     raise JSONGenerationError(f"Schema Validation Failed: {e}", raw_text=text_response)
 
              try:
-                 clean_text = clean_json_markdown(text_response)
-                 return json.loads(clean_text)
-             except json.JSONDecodeError as e:
+                 data = orjson.loads(clean_text)
+             except orjson.JSONDecodeError:
                  logger.error(f"JSON Decode Error. Raw: {text_response[:500]}... Cleaned: {clean_text[:500]}...")
                  raise JSONGenerationError("JSON Parse Failed", raw_text=text_response)
+
+             errors = get_validator(response_schema)(data)
+             if errors:
+                 logger.error(f"Schema Validation Error: {errors}. Raw: {text_response[:500]}...")
+                 raise JSONGenerationError(f"Schema Validation Failed: {'; '.join(errors)}", raw_text=text_response)
+             self.response_cache.put(cache_key, clean_text)
+             if persist and fresh:
+                 self._write_behind(cache_key.hex(), {"text": clean_text})
+             return data
              
         except JSONGenerationError:
             raise
@@ -237,29 +761,77 @@ class LLMClient:
              logger.error(f"Groq JSON Error: {e}")
              raise ValueError(f"Failed to generate JSON: {e}")
 
-class JSONGenerationError(Exception):
-    def __init__(self, message, raw_text):
-        super().__init__(message)
-        self.raw_text = raw_text
+    async def generate_structured_output_batch(self,
+                                             prompts: List[str],
+                                             response_schemas: List[Dict[str, Any]],
+                                             model: str = MODEL_REASONING,
+                                             system_prompts: Optional[List[Optional[str]]] = None,
+                                             **kwargs) -> List[Union[Dict[str, Any], Exception]]:
+        """
+        Structured generation for N independent prompts issued as one batch.
+        Groq's Batch API only completes asynchronously (hours-scale windows), so
+        interactive batches go out concurrently (over one HTTP/2 connection when
+        available) and rely on the provider's continuous batching. Failures are returned in place, not raised, so one
+        bad row does not sink the rest.
+        """
+        if len(prompts) != len(response_schemas):
+            raise ValueError("prompts and response_schemas must have the same length")
+        if system_prompts is None:
+            system_prompts = [None] * len(prompts)
+        return await asyncio.gather(
+            *(self.generate_structured_output(p, s, model=model, system_prompt=sp, **kwargs)
+              for p, s, sp in zip(prompts, response_schemas, system_prompts)),
+            return_exceptions=True
+        )
 
     # Compatibility
     def generate_text(self, prompt: str, model_type: str = "reasoning", temperature: float = 0.7) -> str:
-        """DEPRECATED: Sync wrapper."""
-        model = MODEL_REASONING if model_type == "reasoning" else MODEL_FAST
-        
+        """
+        DEPRECATED: Sync wrapper.
+        The call runs on a long-lived background loop rather than a new loop
+        per call. Blocking inside a coroutine would stall its loop (and deadlock on the
+        background loop itself), so async callers get an error pointing them
+        at `generate`.
+        """
         try:
-            loop = asyncio.get_event_loop()
+            asyncio.get_running_loop()
         except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            
-        if loop.is_running():
-             import concurrent.futures
-             pool = concurrent.futures.ThreadPoolExecutor()
-             future = pool.submit(lambda: asyncio.run(self.generate(prompt, model=model, temperature=temperature)))
-             result = future.result()
-             return result["text"]
-
-        return loop.run_until_complete(
-            self.generate(prompt, model=model, temperature=temperature)
-        )["text"]
+            pass
+        else:
+            raise RuntimeError("generate_text() is sync-only; inside an event loop, await generate() instead")
+        model = MODEL_REASONING if model_type == "reasoning" else MODEL_FAST
+        future = asyncio.run_coroutine_threadsafe(
+            self.generate(prompt, model=model, temperature=temperature),
+            _background_loop()
+        )
+        return future.result()["text"]
+
+_shared_client: Optional[LLMClient] = None
+_shared_client_lock = threading.Lock()
+
+def get_shared_client() -> LLMClient:
+    """Process-wide client: callers share its connection pools and caches."""
+    global _shared_client
+    if _shared_client is None:
+        with _shared_client_lock:
+            if _shared_client is None:
+                _shared_client = LLMClient()
+    return _shared_client
+
+_bg_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """Event loop on a daemon thread that serves the sync `generate_text` wrapper."""
+    global _bg_loop
+    if _bg_loop is None:
+        with _shared_client_lock:
+            if _bg_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="llm-sync", daemon=True).start()
+                _bg_loop = loop
+    return _bg_loop
+
+class JSONGenerationError(Exception):
+    def __init__(self, message, raw_text):
+        super().__init__(message)
+        self.raw_text = raw_text
@@ -12,7 +12,9 @@ class AnalyzeRequest(BaseModel):
 @app.post("/analyze")
 async def analyze_endpoint(payload: AnalyzeRequest):
     try:
-        result = app_instance.handle_request(payload.request, payload.context)
+        # Awaited on the server loop; the sync handle_request would block it
+        # (and asyncio.run() cannot start inside a running loop)
+        result = await app_instance.handle_request_async(payload.request, payload.context)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
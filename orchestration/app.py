@@ -1,4 +1,3 @@
-from orchestration.manager import run_sync_wrapper
 import logging
 
 logger = logging.getLogger("adk_app")
@@ -11,9 +10,24 @@ class MultiAgentApp:
         if context is None:
             context = {}
         logger.info(f"Received request: {user_request}")
+        # Deferred: importing the manager builds the LangGraph graph (~0.5s),
+        # which callers that only import app_instance should not pay for
+        from orchestration.manager import run_sync_wrapper
         # Call the v0.2.0 Async Manager via sync wrapper
         final_report_dict = run_sync_wrapper(user_request, context)
-        
+        return self._to_ui(final_report_dict)
+
+    async def handle_request_async(self, user_request: str, context: dict = None) -> dict:
+        """Same as `handle_request`, awaited on the caller's loop (e.g. FastAPI)."""
+        if context is None:
+            context = {}
+        logger.info(f"Received request: {user_request}")
+        from orchestration.manager import async_manager
+        report = await async_manager.run(user_request, context)
+        return self._to_ui(report.model_dump())
+
+    @staticmethod
+    def _to_ui(final_report_dict: dict) -> dict:
         # TRANSFORMATION LAYER:
         # The UI expects the old schema for "plan_summary", "specialist_findings", "simulation_result"
         # The new report has objects. We need to map them back for UI compatibility until UI is updated.
@@ -1,6 +1,7 @@
 import operator
 import json
 import asyncio
+import os
 import time
 from typing import List, Dict, Any, Optional, Annotated, TypedDict
     
@@ -13,17 +14,52 @@ from core.schemas import (
     CompositeDecision, Decision, DecisionType, IntelligenceSignal, AgentFault
 )
 from core.decision_aggregator import DecisionAggregator
-from llm.llm_client import LLMClient, JSONGenerationError
+from core import model_router
+from core.serialization import composite_prompt_json, context_json
+from llm.llm_client import JSONGenerationError, get_shared_client
 
 # Import Agents
 from agents.planner_agent import PlannerAgent
-from agents.constraint_agent import ConstraintAgent
+from agents.constraint_agent import ConstraintAgent, MAX_CONSTRAINT_RETRIES
 from agents.judgment_agent import JudgmentAgent
 from agents.security_agent import SecurityAgent
 from agents.technology_agent import TechnologyAgent
 from agents.economics_agent import EconomicsAgent
+from agents.specialist_agent import panel_compatible, run_panel
 from agents.simulation_agent import SimulationAgent
 
+_SIGNAL_SCHEMA = IntelligenceSignal.model_json_schema()
+
+# Agents hold no per-run state, so one instance per class serves every run
+_AGENTS: Dict[type, Any] = {}
+
+def _agent(cls):
+    agent = _AGENTS.get(cls)
+    if agent is None:
+        agent = _AGENTS[cls] = cls()
+    return agent
+
+# Upper bound on one specialist call (or batched group), so a stuck agent
+# costs its own steps a TIMEOUT fault instead of holding up the node
+SPECIALIST_STEP_TIMEOUT = 45.0
+
+# Plans up to this size with compatible specialists go out as one panel
+# call; the combined reply stays well inside the assessment tier's budget
+PANEL_MAX_STEPS = 6
+
+# The panel is opt-in. It saves requests near the RPM limit, but one call
+# carries every step, so there is no per-agent batching, no abort-quorum
+# cancellation, and a timeout faults the whole plan instead of one group.
+PANEL_ENABLED = os.environ.get("SPECIALIST_PANEL", "").lower() in ("1", "true", "yes")
+
+_SALVAGE_SYSTEM_PROMPT = """You are a recovery system. The agent output you receive failed schema validation.
+Extract any useful STRATEGIC SIGNALS.
+
+Return JSON matching IntelligenceSignal:
+- summary_points (max 3)
+- inferred_risk_delta (-2 to +2)
+- confidence (0.1 to 0.4)"""
+
 # Define State
 class CoordinatorState(TypedDict):
     # Inputs
@@ -36,6 +72,7 @@ class CoordinatorState(TypedDict):
     plan: Optional[ExecutionPlan]
     specialist_decisions: List[SpecialistDecision]
     composite_decision: Optional[CompositeDecision]
+    composite_json: Optional[str] # Prompt encoding of composite_decision, made once
     
     # A2A Loop State
     constraint_result: Optional[ConstraintResult]
@@ -53,7 +90,8 @@ class CoordinatorState(TypedDict):
     # Execution State
     execution_phase: str # ExecutionPhase Enum
     final_status: Optional[RunStatus]
-    timestamps: Dict[str, str]
+    # Nodes return only their own entries; the reducer merges them in
+    timestamps: Annotated[Dict[str, str], operator.or_]
 
 async def node_plan(state: CoordinatorState) -> Dict:
     """Generates the execution plan (v0.3.0)."""
@@ -61,7 +99,7 @@ async def node_plan(state: CoordinatorState) -> Dict:
     ctx = state["context"]
     
     try:
-        planner_agent = PlannerAgent()
+        planner_agent = _agent(PlannerAgent)
         res = await planner_agent.run({"user_request": req, "scenario_context": ctx})
         plan_data = res.get("plan", {})
         plan = ExecutionPlan(**plan_data)
@@ -71,7 +109,7 @@ async def node_plan(state: CoordinatorState) -> Dict:
         
     return {
         "plan": plan, 
-        "timestamps": {**state.get("timestamps", {}), "plan_done": datetime.now().isoformat()}
+        "timestamps": {"plan_done": datetime.now().isoformat()}
     }
 
 async def node_specialists(state: CoordinatorState) -> Dict:
@@ -87,33 +125,23 @@ async def node_specialists(state: CoordinatorState) -> Dict:
         """Generates a short 'thinking' monologue for the UI."""
         prompt = f"Summarize this decision by {agent_name} as a first-person inner monologue (1 sentence): {decision.recommended_action}"
         try:
-             client = LLMClient()
-             # Use Fast model for UI fluff
-             res = await client.generate(prompt, model="openai/gpt-oss-20b", max_tokens=60)
+             client = get_shared_client()
+             # Use the smallest tier for UI fluff
+             res = await client.generate(prompt, model=model_router.pick("verdict"), max_tokens=60)
              return res["text"].strip()
         except:
              return "Processing intelligence..."
 
     async def _salvage_intelligence(raw_text: str, agent_name: str) -> Optional[IntelligenceSignal]:
         """Attempts to extract partial signals from broken JSON output."""
-        prompt = f"""
-        You are a recovery system. The following output from {agent_name} failed schema validation.
-        Extract any useful STRATEGIC SIGNALS.
-        
-        RAW OUTPUT:
-        {raw_text[:2000]}
-        
-        Return JSON matching IntelligenceSignal:
-        - summary_points (max 3)
-        - inferred_risk_delta (-2 to +2)
-        - confidence (0.1 to 0.4)
-        """
+        prompt = f"AGENT: {agent_name}\nRAW OUTPUT:\n{raw_text[:2000]}\n"
         try:
-            client = LLMClient()
+            client = get_shared_client()
             res = await client.generate_structured_output(
                 prompt,
-                response_schema=IntelligenceSignal.model_json_schema(),
-                model="openai/gpt-oss-20b",
+                response_schema=_SIGNAL_SCHEMA,
+                model=model_router.pick("assessment"),
+                system_prompt=_SALVAGE_SYSTEM_PROMPT,
                 max_tokens=300
             )
             res["source_agent"] = agent_name # Ensure field
@@ -122,21 +150,26 @@ async def node_specialists(state: CoordinatorState) -> Dict:
             print(f"Salvage failed: {e}")
             return None
 
+    # Encoded once: every specialist prompt then opens with the same bytes
+    ctx_str = context_json(ctx)
+
+    def agent_for(step):
+        agent_name = step.agent.lower()
+        if "security" in agent_name: return _agent(SecurityAgent)
+        if "technology" in agent_name: return _agent(TechnologyAgent)
+        if "economics" in agent_name: return _agent(EconomicsAgent)
+        return None
+
     # Step Runner
     async def run_step(step):
         agent_name = step.agent.lower()
-        agent = None
-        if "security" in agent_name: agent = SecurityAgent()
-        elif "technology" in agent_name: agent = TechnologyAgent()
-        elif "economics" in agent_name: agent = EconomicsAgent()
-        else: agent = None
+        agent = agent_for(step)
         
         if agent:
-             payload = {"instruction": step.objective, "context": ctx}
+             payload = {"instruction": step.objective, "context_str": ctx_str}
              try:
-                 res = await agent.run(payload)
-                 decision_data = res.get("decision", {})
-                 decision = Decision(**decision_data)
+                 # Specialists return their validated Decision subclass; no re-validation
+                 decision = Decision.model_validate(await agent.run(payload))
                  
                  # Success! Generate thought trace
                  trace = await _generate_thought_trace(decision, agent_name)
@@ -187,18 +220,127 @@ async def node_specialists(state: CoordinatorState) -> Dict:
              )
              return SpecialistDecision(agent=agent_name, step_id=step.step_id, fault=fault)
     
-    tasks = [run_step(s) for s in plan.steps]
-    results = await asyncio.gather(*tasks)
+    def step_fault(step, message: str, fault_type: str = "SYSTEM_ERROR") -> SpecialistDecision:
+        fault = AgentFault(
+            fault_type=fault_type,
+            agent=step.agent.lower(),
+            step_id=step.step_id,
+            message=message[:300]
+        )
+        return SpecialistDecision(agent=step.agent.lower(), step_id=step.step_id, fault=fault)
+
+    async def run_group(indices):
+        """One call for every step routed to the same agent; per-step calls if the batch fails."""
+        steps = [plan.steps[i] for i in indices]
+        if len(steps) == 1:
+            return [await run_step(steps[0])]
+        agent = agent_for(steps[0])
+        agent_name = steps[0].agent.lower()
+        try:
+            decisions = await agent.run_batch([s.objective for s in steps], {"context_str": ctx_str})
+        except Exception as e:
+            print(f"Batch failed for {agent_name} ({e}); running steps individually")
+            return list(await asyncio.gather(*(run_step(s) for s in steps)))
+        decisions = [Decision.model_validate(d) for d in decisions]
+        traces = await asyncio.gather(*(_generate_thought_trace(d, agent_name) for d in decisions))
+        return [
+            SpecialistDecision(agent=agent_name, step_id=s.step_id, decision=d, thought_trace=t)
+            for s, d, t in zip(steps, decisions, traces)
+        ]
+
+    async def run_group_bounded(indices):
+        try:
+            return await asyncio.wait_for(run_group(indices), SPECIALIST_STEP_TIMEOUT)
+        except asyncio.TimeoutError:
+            return [
+                step_fault(plan.steps[i], f"Timed out after {SPECIALIST_STEP_TIMEOUT:g}s", "TIMEOUT")
+                for i in indices
+            ]
+
+    # Steps routed to the same specialist share one batched call; unknown
+    # agents stay as single steps so each gets its own configuration fault.
+    groups: Dict[Any, List[int]] = {}
+    for i, step in enumerate(plan.steps):
+        agent = agent_for(step)
+        groups.setdefault(agent if agent is not None else ("step", i), []).append(i)
+
+    async def run_panel_bounded(agents):
+        """Every step in one call; None sends the node back to the per-agent fan-out."""
+        try:
+            decisions = await asyncio.wait_for(
+                run_panel([(a, s.objective) for a, s in zip(agents, plan.steps)], ctx_str),
+                SPECIALIST_STEP_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            return [
+                step_fault(s, f"Timed out after {SPECIALIST_STEP_TIMEOUT:g}s", "TIMEOUT")
+                for s in plan.steps
+            ]
+        except Exception as e:
+            print(f"Panel call failed ({e}); falling back to per-agent calls")
+            return None
+        decisions = [Decision.model_validate(d) for d in decisions]
+        names = [s.agent.lower() for s in plan.steps]
+        traces = await asyncio.gather(*(_generate_thought_trace(d, n) for d, n in zip(decisions, names)))
+        return [
+            SpecialistDecision(agent=n, step_id=s.step_id, decision=d, thought_trace=t)
+            for s, n, d, t in zip(plan.steps, names, decisions, traces)
+        ]
+
+    # With SPECIALIST_PANEL set, a small plan across several compatible
+    # specialists is one request rather than one per agent.
+    agents = [agent_for(s) for s in plan.steps]
+    if PANEL_ENABLED and len(groups) > 1 and len(plan.steps) <= PANEL_MAX_STEPS \
+            and None not in agents and panel_compatible(agents):
+        panel = await run_panel_bounded(agents)
+        if panel is not None:
+            return {
+                "specialist_decisions": panel,
+                "timestamps": {"specialists_done": datetime.now().isoformat()}
+            }
+
+    # Groups are independent network-bound calls: fan out and consume them as
+    # they finish. An exception escaping a group becomes a fault for its steps,
+    # and a group past SPECIALIST_STEP_TIMEOUT is cancelled and faulted alone.
+    # Once two qualifying ABORTs are in, the aggregator's verdict is fixed, so
+    # the remaining calls are cancelled rather than awaited.
+    tasks = {asyncio.create_task(run_group_bounded(idx)): idx for idx in groups.values()}
+    results: List[Optional[SpecialistDecision]] = [None] * len(plan.steps)
+    pending = set(tasks)
+    abort_votes = 0
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            indices = tasks[task]
+            if task.exception() is not None:
+                for i in indices:
+                    results[i] = step_fault(plan.steps[i], str(task.exception()))
+                continue
+            for i, sd in zip(indices, task.result()):
+                results[i] = sd
+                if sd.decision is not None and DecisionAggregator.is_qualified_abort(sd.decision):
+                    abort_votes += 1
+
+        if abort_votes >= 2 and pending:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for task in pending:
+                for i in tasks[task]:
+                    results[i] = step_fault(plan.steps[i], "Cancelled: abort quorum reached")
+            break
     
     return {
         "specialist_decisions": results,
-        "timestamps": {**state.get("timestamps", {}), "specialists_done": datetime.now().isoformat()}
+        "timestamps": {"specialists_done": datetime.now().isoformat()}
     }
 
 async def node_aggregate(state: CoordinatorState) -> Dict:
     """Deterministically aggregates decisions."""
     comp = DecisionAggregator.aggregate(state["specialist_decisions"])
-    return {"composite_decision": comp}
+    # Constraint and judgment (and every retry between them) embed the same
+    # composite in their prompts; encode it once here
+    return {"composite_decision": comp, "composite_json": composite_prompt_json(comp)}
 
 async def node_constraint(state: CoordinatorState) -> Dict:
     """Checks constraints on the CompositeDecision."""
@@ -206,7 +348,7 @@ async def node_constraint(state: CoordinatorState) -> Dict:
     feedback = state.get("judgment_feedback")
     
     try:
-        constraint_agent = ConstraintAgent()
+        constraint_agent = _agent(ConstraintAgent)
         # "DEGRADED_LLM automatically PASSES"
         # We use Risk 0 as the marker for "System Neutral / Degraded"
         prim = comp.primary_decision
@@ -216,10 +358,11 @@ async def node_constraint(state: CoordinatorState) -> Dict:
                  warnings=["Validation Skipped: System Degraded / Low Risk"], 
                  ethical_flags=[], legal_flags=[])
         else:
-             # Pass model_dump() usually
              payload = {
-                 "composite_decision": comp.model_dump(),
-                 "judgment_feedback": feedback
+                 "composite_decision": comp,
+                 "composite_json": state.get("composite_json"),
+                 "judgment_feedback": feedback,
+                 "retry_count": state.get("retry_count", 0)
              }
              res = await constraint_agent.run(payload)
              c_data = res.get("constraint_check", {})
@@ -231,7 +374,7 @@ async def node_constraint(state: CoordinatorState) -> Dict:
     
     return {
         "constraint_result": result,
-        "timestamps": {**state.get("timestamps", {}), "constraint_done": datetime.now().isoformat()}
+        "timestamps": {"constraint_done": datetime.now().isoformat()}
     }
 
 async def node_judgment(state: CoordinatorState) -> Dict:
@@ -241,10 +384,11 @@ async def node_judgment(state: CoordinatorState) -> Dict:
     ctx = state["context"]
     
     try:
-        judgment_agent = JudgmentAgent()
+        judgment_agent = _agent(JudgmentAgent)
         payload = {
-            "composite_decision": comp.model_dump(),
-            "constraint_output": c_result.model_dump(),
+            "composite_decision": comp,
+            "composite_json": state.get("composite_json"),
+            "constraint_output": c_result,
             "context": ctx
         }
         res = await judgment_agent.run(payload)
@@ -262,71 +406,62 @@ async def node_judgment(state: CoordinatorState) -> Dict:
         "retry_count": state.get("retry_count", 0) + 1
     }
 
+def _simulation_turns(analysis: Dict[str, Any]) -> List[Any]:
+    """History entries from the agent's reply: one per compared scenario."""
+    return [
+        {
+            "turn": i,
+            "actor": "A",
+            "action": sc.get("name", f"Scenario {i}"),
+            "outcome": sc.get("stability_assessment", ""),
+            "validation": {"valid": True},
+            "meta": {k: sc[k] for k in ("expected_behaviour", "qualitative_payoffs") if k in sc}
+        }
+        for i, sc in enumerate(analysis.get("scenarios") or [], 1)
+    ]
+
 async def node_simulation_run(state: CoordinatorState) -> Dict:
     """Runs the simulation with the FINAL Decision."""
-    # This node might run ONCE after approval, or iteratively?
-    # Requirement: "SimulationAgent: Receives FINAL Decision ONLY... Runs turn-based simulation"
-    # Assuming one pass or a managed internal loop.
-    # Let's run a multi-turn simulation here or delegate to a loop?
-    # prompt implies "Simulation Must Be State-Enforced... Output SimulationResult"
-    
-    # We will run a loop of X turns explicitly here calling Sim Agent repeatedly 
-    # OR Sim Agent runs the whole thing? 
-    # "LLMs may PROPOSE moves... System MUST VALIDATE" -> Simulation Agent.
-    # Let's assume we run N turns.
-    
+    # "SimulationAgent: Receives FINAL Decision ONLY... Runs turn-based simulation"
     final_dec = state["judgment_result"].final_decision
     if not final_dec:
         return {"status": RunStatus.SYSTEM_ERROR}
         
     current_state = state.get("simulation_state", state["context"].get("initial_state", {}))
-    history = []
     
-    sim_agent = SimulationAgent()
+    sim_agent = _agent(SimulationAgent)
     max_turns = state["context"].get("max_turns", 3)
+    comp = state.get("composite_decision")
+    consensus = comp.consensus_score if comp else 1.0
     
-    stability = 1.0
-    outcome = "IN_PROGRESS"
+    # One agent call covers the whole horizon; the agent compares scenarios
+    # over `max_turns` in a single structured response.
+    payload = {
+        "final_decision": final_dec,
+        "consensus_score": consensus,
+        "simulation_state": current_state,
+        "max_turns": max_turns
+    }
     
-    for i in range(max_turns):
-        # In a real engine, we'd have opponents. For now, we simulate the consequences of the User's Decision.
-        # Simple loop: Apply Decision -> Update State -> Check Stability.
-        
-        payload = {
-            "final_decision": final_dec.model_dump(),
-            "simulation_state": current_state,
-            "history": [h.model_dump() for h in history]
-        }
-        
-        try:
-            res = await sim_agent.run(payload)
-            turn_data = res.get("simulation_turn", {})
-            # Validate output turn
-            # In a real system the AGENT proposes and the CODE validates.
-            # Here the agent does both in the mock (SimAgent.run calls LLM which returns 'validation').
-            # We trust the SimAgent's internal validation for this v0.3.0
-            
-            # Map loosely to SimulationTurn
-            # The SimAgent returns a dict matching the schema.
-            # We construct objects
-            pass
-            # Update state (mock)
-            # current_state.update(...)
-            
-            # For now, we just construct the result at the end
-            outcome = "COMPLETED"
-        except Exception as e:
-            outcome = f"CRASH: {e}"
-            break
-            
-    # Mock result construction since Sim logic is mocked
-    sim_res = SimulationResult(
-        final_state=current_state,
-        outcome=outcome,
-        stability_score=stability,
-        turn_count=max_turns,
-        history=[]
-    )
+    try:
+        res = await sim_agent.run(payload)
+        turns = _simulation_turns(res.get("simulation_result") or {})
+        sim_res = SimulationResult(
+            final_state=current_state,
+            outcome="COMPLETED",
+            stability_score=1.0,
+            turn_count=len(turns),
+            history=turns,
+            meta={"analysis": res.get("simulation_result", {}), "summary": res.get("simulation_history", [])}
+        )
+    except Exception as e:
+        sim_res = SimulationResult(
+            final_state=current_state,
+            outcome=f"CRASH: {e}",
+            stability_score=1.0,
+            turn_count=0,
+            history=[]
+        )
     
     return {
         "simulation_result": sim_res,
@@ -399,7 +534,15 @@ def build_graph():
     workflow.add_edge("plan", "specialists")
     workflow.add_edge("specialists", "aggregate")
     workflow.add_edge("aggregate", "constraint")
-    workflow.add_edge("constraint", "judgment")
+    
+    def check_constraint_cap(state):
+        # The constraint agent fails closed once the retry cap is reached;
+        # there is nothing left for judgment to weigh
+        if state.get("retry_count", 0) >= MAX_CONSTRAINT_RETRIES:
+            return "finalize"
+        return "judgment"
+    
+    workflow.add_conditional_edges("constraint", check_constraint_cap)
     
     def check_judgment_loop(state):
         if state.get("status") == RunStatus.SYSTEM_ERROR:
@@ -417,11 +560,8 @@ def build_graph():
              # Degraded state implicitly approves to avoid blocking
              return "simulation_run"
         
-        if state["retry_count"] <= 1:
-            return "constraint"
-            
-        # Abort if retries exhausted
-        return "finalize"
+        # Retries are bounded by the constraint agent's MAX_CONSTRAINT_RETRIES
+        return "constraint"
         
     workflow.add_conditional_edges("judgment", check_judgment_loop)
     workflow.add_edge("simulation_run", "finalize")
@@ -11,10 +11,19 @@ from datetime import datetime
 
 from orchestration.graph import coordinator_graph, CoordinatorState
 from core.schemas import FinalReport
+from llm.llm_client import get_shared_client
 
 # Initialize Logger
 logger = logging.getLogger("manager_run")
 
+def _write_report(path: str, data: bytes) -> None:
+    """Atomic write, so a reader never sees a partial report."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
 async def manager_run(
     user_request: str, 
     context: Dict[str, Any], 
@@ -64,6 +73,7 @@ async def manager_run(
         "judgment_feedback": None,
         "plan": None,
         "composite_decision": None,
+        "composite_json": None,
         "constraint_result": None,
         "judgment_result": None,
         "simulation_result": None,
@@ -72,7 +82,9 @@ async def manager_run(
 
     report = None
 
-    async for output in coordinator_graph.astream(initial_state):
+    # Per-node deltas drive the events; finalize's delta carries the report,
+    # so the accumulated state ("values" mode) is never needed here
+    async for output in coordinator_graph.astream(initial_state, stream_mode="updates"):
         for node_name, state_update in output.items():
             
             if node_name == "plan":
@@ -114,18 +126,17 @@ async def manager_run(
                 emit("simulation", payload=res)
                 
             elif node_name == "finalize":
-                if "final_report" in state_update:
-                     report = state_update["final_report"]
+                report = state_update["final_report"]
     
+    # Let background LLM cache writes land before the loop can be torn down
+    await get_shared_client().flush()
+
     # Saving to file
     if report:
-        # Persistence
-        os.makedirs("runs", exist_ok=True)
-        report_path = f"runs/{run_id}.json"
-        tmp_path = report_path + ".tmp"
-        with open(tmp_path, "w") as f:
-            f.write(report.model_dump_json(indent=2))
-        os.replace(tmp_path, report_path)
+        # Compact JSON (pretty-print on read if needed); the file I/O runs
+        # off the loop so a large simulation report does not stall it
+        report_path = os.path.join(os.environ.get("RUNS_DIR", "runs"), f"{run_id}.json")
+        await asyncio.to_thread(_write_report, report_path, report.model_dump_json().encode())
         
         emit("done", payload=report)
         return report.model_dump()
@@ -1,4 +1,5 @@
 import uvicorn
+import logging
 import os
 import sys
 from dotenv import load_dotenv
@@ -10,6 +11,7 @@ load_dotenv()
 sys.path.append(os.getcwd())
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     port = int(os.environ.get("PORT", 8000))
     print(f"Starting Multi-Agent Server on port {port}...")
     uvicorn.run("orchestration.api:app", host="0.0.0.0", port=port, reload=True)
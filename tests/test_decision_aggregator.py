@@ -0,0 +1,51 @@
+from core.decision_aggregator import DecisionAggregator
+from core.schemas import Decision, DecisionType, SpecialistDecision
+
+def _sd(agent, decision_type, risk, confidence=0.8):
+    return SpecialistDecision(
+        agent=agent,
+        decision=Decision(
+            decision_type=decision_type,
+            recommended_action=f"{agent} action",
+            confidence=confidence,
+            risk_score=risk,
+            rationale_summary=[f"{agent} rationale"]
+        )
+    )
+
+def test_low_risk_majority_approves_at_median_risk():
+    comp = DecisionAggregator.aggregate([
+        _sd("security", DecisionType.MODIFY, 2),
+        _sd("technology", DecisionType.APPROVE, 3),
+        _sd("economics", DecisionType.REJECT, 9),
+    ])
+    prim = comp.primary_decision
+    assert prim.decision_type == DecisionType.APPROVE
+    assert prim.risk_score == 3
+    assert prim.recommended_action == "technology action"
+    assert comp.consensus_score == 2 / 3
+
+def test_two_confident_aborts_override():
+    comp = DecisionAggregator.aggregate([
+        _sd("security", DecisionType.ABORT, 9),
+        _sd("technology", DecisionType.ABORT, 8),
+        _sd("economics", DecisionType.APPROVE, 1),
+    ])
+    assert comp.primary_decision.decision_type == DecisionType.ABORT
+    assert comp.primary_decision.risk_score == 9
+
+def test_high_median_risk_rejects():
+    comp = DecisionAggregator.aggregate([
+        _sd("security", DecisionType.APPROVE, 7),
+        _sd("technology", DecisionType.APPROVE, 8),
+    ])
+    assert comp.primary_decision.decision_type == DecisionType.REJECT
+
+def test_majority_vote_tie_goes_to_first_seen_type():
+    comp = DecisionAggregator.aggregate([
+        _sd("security", DecisionType.MODIFY, 5),
+        _sd("technology", DecisionType.ESCALATE, 5),
+        _sd("economics", DecisionType.ESCALATE, 4),
+        _sd("diplomacy", DecisionType.MODIFY, 6),
+    ])
+    assert comp.primary_decision.decision_type == DecisionType.MODIFY
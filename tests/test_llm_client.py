@@ -1,19 +1,45 @@
+import os
 import pytest
 import asyncio
+import threading
+import time
 from unittest.mock import MagicMock, AsyncMock, patch
-from llm.llm_client import LLMClient
+from llm import llm_client
+from llm.llm_client import LLMClient, JSONGenerationError
+
+class FakeStream:
+    """Minimal stand-in for the SDK's AsyncStream of chat completion chunks."""
+    def __init__(self, texts):
+        self.texts = texts
+        self.consumed = 0
+        self.closed = False
+
+    async def __aiter__(self):
+        for text in self.texts:
+            self.consumed += 1
+            c = MagicMock()
+            c.choices[0].delta.content = text
+            yield c
+
+    async def close(self):
+        self.closed = True
 
 # Mock Groq classes
 @pytest.fixture
 def mock_groq():
-    with patch("llm.llm_client.AsyncGroq") as MockClient:
+    # Bind the real SDK names first so the patches below replace them
+    llm_client._load_groq()
+    # The http client is patched too, so no real httpx client reads the
+    # environment (SSLKEYLOGFILE etc.) during a test
+    with patch("llm.llm_client.AsyncGroq") as MockClient, \
+         patch("llm.llm_client.DefaultAsyncHttpxClient"):
         mock_instance = AsyncMock()
         MockClient.return_value = mock_instance
         yield mock_instance
 
 @pytest.fixture
-def client(mock_groq):
-    with patch("os.environ.get", return_value="dummy_key"), \
+def client(mock_groq, tmp_path):
+    with patch.dict(os.environ, {"GROQ_API_KEY": "dummy_key", "LLM_CACHE_DIR": str(tmp_path)}), \
          patch("llm.llm_client.LLMClient._read_cache", new_callable=AsyncMock) as mock_read:
         
         mock_read.return_value = None # Force no cache
@@ -52,8 +78,391 @@ async def test_structured_output_json_mode(client, mock_groq):
     mock_response.choices[0].message.content = '{"foo": "bar"}'
     mock_chat.return_value = mock_response
     
-    await client.generate_structured_output("Prompt", {"type": "obj"})
-    
+    schema = {"type": "object", "title": "Foo Result"}
+    await client.generate_structured_output("Prompt", schema)
+
+    # Schema-capable models get the schema as a response format, not prompt text
     call_kwargs = mock_chat.call_args.kwargs
-    assert call_kwargs["response_format"] == {"type": "json_object"}
+    assert call_kwargs["response_format"] == {
+        "type": "json_schema", "json_schema": {"name": "Foo_Result", "schema": schema}
+    }
+    assert "Schema:" not in call_kwargs["messages"][0]["content"]
     assert call_kwargs["temperature"] == 0.1
+
+    await client.generate_structured_output("Prompt", schema, model="llama-3.1-8b-instant")
+    call_kwargs = mock_chat.call_args.kwargs
+    assert call_kwargs["response_format"] == {"type": "json_object"}
+    assert '"title":"Foo Result"' in call_kwargs["messages"][0]["content"]
+
+@pytest.mark.asyncio
+async def test_structured_output_missing_required_field(client, mock_groq):
+    """Payloads missing required schema fields surface as JSONGenerationError for salvage."""
+    mock_chat = AsyncMock()
+    mock_groq.chat.completions.create = mock_chat
+
+    mock_response = MagicMock()
+    mock_response.choices[0].message.content = '{"foo": "bar"}'
+    mock_chat.return_value = mock_response
+
+    schema = {"type": "object", "required": ["foo", "risk_score"]}
+    with pytest.raises(JSONGenerationError) as exc:
+        await client.generate_structured_output("Prompt", schema)
+    assert exc.value.raw_text == '{"foo": "bar"}'
+
+@pytest.mark.asyncio
+async def test_structured_output_system_prompt_prefix(client, mock_groq):
+    """Static agent prompts travel in the system message, ahead of the per-call payload."""
+    mock_chat = AsyncMock()
+    mock_groq.chat.completions.create = mock_chat
+
+    mock_response = MagicMock()
+    mock_response.choices[0].message.content = '{"foo": "bar"}'
+    mock_chat.return_value = mock_response
+
+    await client.generate_structured_output("Dynamic", {"type": "object"}, model="llama-3.1-8b-instant", system_prompt="STATIC ROLE")
+
+    system_msg, user_msg = mock_chat.call_args.kwargs["messages"]
+    assert system_msg["role"] == "system" and system_msg["content"].endswith("STATIC ROLE")
+    assert "STATIC ROLE" not in user_msg["content"]
+    assert '"type":"object"' in system_msg["content"]
+    assert "schema" not in user_msg["content"].lower()
+    assert user_msg["content"].endswith("Dynamic")
+
+@pytest.mark.asyncio
+async def test_generate_text_stream_yields_deltas(client, mock_groq):
+    """Streaming requests stream=True and yields only non-empty deltas."""
+    stream = FakeStream(["Hel", None, "lo"])
+    mock_chat = AsyncMock(return_value=stream)
+    mock_groq.chat.completions.create = mock_chat
+
+    parts = [p async for p in client.generate_text_stream("Hi", system_prompt="ROLE")]
+
+    assert parts == ["Hel", "lo"]
+    assert mock_chat.call_args.kwargs["stream"] is True
+    assert stream.closed
+
+    # Short model aliases resolve as they do for generate()
+    mock_chat.return_value = FakeStream(["ok"])
+    assert [p async for p in client.generate_text_stream("Hi", model="gptss120b")] == ["ok"]
+    assert mock_chat.call_args.kwargs["model"] == client.MODEL_REASONING
+
+@pytest.mark.asyncio
+async def test_generate_text_stream_closes_when_consumer_stops(client, mock_groq):
+    """Abandoning the stream releases the connection instead of decoding the rest."""
+    stream = FakeStream(["a", "b", "c"])
+    mock_groq.chat.completions.create = AsyncMock(return_value=stream)
+
+    gen = client.generate_text_stream("Hi")
+    assert await gen.__anext__() == "a"
+    await gen.aclose()
+
+    assert stream.closed and stream.consumed == 1
+
+@pytest.mark.asyncio
+async def test_structured_output_response_model(client, mock_groq):
+    """With a response_model the reply is validated in one pass and returned as the model."""
+    from core.schemas import Decision
+    mock_chat = AsyncMock()
+    mock_groq.chat.completions.create = mock_chat
+
+    mock_response = MagicMock()
+    mock_response.choices[0].message.content = (
+        '{"decision_type": "APPROVE", "recommended_action": "Hold", '
+        '"confidence": 0.8, "risk_score": 3, "rationale_summary": ["ok"]}'
+    )
+    mock_chat.return_value = mock_response
+
+    result = await client.generate_structured_output("Prompt", {"type": "object"}, response_model=Decision)
+    assert isinstance(result, Decision) and result.risk_score == 3
+
+    # Decision is frozen, so a repeat copies the validated instance instead of
+    # re-validating; callers never share its mutable list fields
+    result.rationale_summary.append("caller edit")
+    with patch.object(Decision, "model_validate_json") as revalidate:
+        again = await client.generate_structured_output("Prompt", {"type": "object"}, response_model=Decision)
+    assert again is not result and again.rationale_summary == ["ok"]
+    revalidate.assert_not_called()
+    assert mock_chat.call_count == 1
+
+    mock_response.choices[0].message.content = '{"decision_type": "APPROVE", "risk_score": 42}'
+    with pytest.raises(JSONGenerationError):
+        await client.generate_structured_output("Other prompt", {"type": "object"}, response_model=Decision)
+
+@pytest.mark.asyncio
+async def test_structured_output_repeat_served_from_cache(client, mock_groq):
+    """An identical structured request reuses the validated reply instead of calling the API."""
+    mock_chat = AsyncMock()
+    mock_groq.chat.completions.create = mock_chat
+
+    mock_response = MagicMock()
+    mock_response.choices[0].message.content = '```json\n{"foo": "bar"}\n```'
+    mock_chat.return_value = mock_response
+
+    first = await client.generate_structured_output("Prompt", {"type": "object"}, system_prompt="ROLE")
+    second = await client.generate_structured_output("Prompt", {"type": "object"}, system_prompt="ROLE")
+
+    assert first == second == {"foo": "bar"}
+    assert first is not second
+    assert mock_chat.call_count == 1
+
+    await client.generate_structured_output("Prompt", {"type": "object"}, system_prompt="OTHER ROLE")
+    assert mock_chat.call_count == 2
+
+@pytest.mark.asyncio
+async def test_generate_repeat_served_from_memory(client, mock_groq):
+    """A repeated generate() is answered in-process without touching the API or disk."""
+    mock_chat = AsyncMock()
+    mock_groq.chat.completions.create = mock_chat
+
+    mock_response = MagicMock()
+    mock_response.choices[0].finish_reason = "stop"
+    mock_response.choices[0].message.content = "Response"
+    mock_chat.return_value = mock_response
+
+    with patch.object(LLMClient, "_write_cache", new_callable=AsyncMock):
+        first = await client.generate("Hi", seed=1)
+        second = await client.generate("Hi", seed=1)
+
+    assert mock_chat.call_count == 1
+    assert client._read_cache.await_count == 1
+    assert first["meta"]["cached"] is False
+    assert second["meta"]["cached"] is True and second["text"] == "Response"
+
+def test_schema_json_serialized_once_per_schema():
+    """Module-level schemas are dumped once; a new dict with equal content gets its own entry."""
+    from llm.llm_client import get_schema_json
+    schema = {"type": "object", "required": ["a"]}
+    import orjson
+    with patch("llm.llm_client.orjson.dumps", wraps=orjson.dumps) as dumps:
+        first = get_schema_json(schema)
+        assert get_schema_json(schema) is first
+        assert dumps.call_count == 1
+        get_schema_json(dict(schema))
+        assert dumps.call_count == 2
+
+def test_generate_text_sync_wrapper_reuses_background_loop(client):
+    """The deprecated sync wrapper runs on one long-lived loop instead of a new one per call."""
+    with patch.object(client, "generate", AsyncMock(return_value={"text": "hi", "meta": {}})) as gen:
+        assert client.generate_text("p") == "hi"
+        loop = llm_client._bg_loop
+        assert client.generate_text("p", model_type="fast") == "hi"
+    assert llm_client._bg_loop is loop and loop.is_running()
+    assert gen.call_args.kwargs["model"] == llm_client.MODEL_FAST
+
+@pytest.mark.asyncio
+async def test_generate_text_rejects_running_loop(client):
+    """Called from a coroutine, the sync wrapper refuses instead of blocking the loop."""
+    with patch.object(client, "generate", AsyncMock()) as gen:
+        with pytest.raises(RuntimeError, match="await generate"):
+            client.generate_text("p")
+    gen.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_generate_with_retries_reads_cache_once(client, mock_groq):
+    """Retries repeat only the API call, not the cache lookup."""
+    mock_response = MagicMock()
+    mock_response.choices[0].finish_reason = "stop"
+    mock_response.choices[0].message.content = "Recovered"
+    mock_groq.chat.completions.create = AsyncMock(side_effect=[RuntimeError("boom"), mock_response])
+
+    with patch.object(LLMClient, "_write_cache", new_callable=AsyncMock), \
+         patch("llm.llm_client.asyncio.sleep", new_callable=AsyncMock):
+        result = await client.generate_with_retries("Hi", retries=2)
+
+    assert result["text"] == "Recovered"
+    assert mock_groq.chat.completions.create.await_count == 2
+    assert client._read_cache.await_count == 1
+
+@pytest.mark.asyncio
+async def test_disk_cache_io_runs_on_cache_pool(mock_groq, tmp_path):
+    """Cache files are read and written on the client's own threads, never on the loop."""
+    import threading
+    with patch.dict(os.environ, {"GROQ_API_KEY": "dummy_key"}):
+        llm = LLMClient()
+    llm.cache_dir = str(tmp_path)
+    threads = []
+    read_json, write_json = llm._read_json_file, llm._write_json_file
+
+    def spy(fn):
+        def wrapper(*args):
+            threads.append(threading.current_thread().name)
+            return fn(*args)
+        return wrapper
+
+    with patch.object(llm, "_read_json_file", spy(read_json)), \
+         patch.object(llm, "_write_json_file", spy(write_json)):
+        assert await llm._read_cache("ab" * 16) is None
+        await llm._write_cache("ab" * 16, {"text": "t", "meta": {}})
+        assert await llm._read_cache("ab" * 16) == {"text": "t", "meta": {}}
+
+    assert len(threads) == 3 and all(t.startswith("llm-cache") for t in threads)
+    llm.close()
+
+@pytest.mark.asyncio
+async def test_structured_output_json_wrapped_in_prose(client, mock_groq):
+    """A bare object surrounded by chatter is still recovered without a retry."""
+    mock_response = MagicMock()
+    mock_response.choices[0].message.content = 'Sure! Here it is: {"foo": ["bar"]} Let me know.'
+    mock_groq.chat.completions.create = AsyncMock(return_value=mock_response)
+
+    assert await client.generate_structured_output("Prompt", {"type": "object"}) == {"foo": ["bar"]}
+
+@pytest.mark.asyncio
+async def test_generate_writes_disk_cache_in_background(client, mock_groq):
+    """A cache miss returns before the disk write finishes; flush() waits for it."""
+    mock_response = MagicMock()
+    mock_response.choices[0].finish_reason = "stop"
+    mock_response.choices[0].message.content = "Response"
+    mock_groq.chat.completions.create = AsyncMock(return_value=mock_response)
+
+    release = asyncio.Event()
+    written = []
+
+    async def slow_write(key, data):
+        await release.wait()
+        written.append(key)
+
+    with patch.object(client, "_write_cache", slow_write):
+        result = await client.generate("Hi")
+        assert result["text"] == "Response" and not written
+        release.set()
+        await client.flush()
+
+    assert len(written) == 1 and not client._pending_writes
+
+def test_extract_json_keeps_bare_json_with_backticks_inside():
+    from llm.llm_client import _extract_json
+    bare = '{"note": "use ```json fences``` sparingly"}'
+    assert _extract_json(f"  {bare}\n") == bare
+    assert _extract_json(f"```json\n{{\"a\": 1}}\n```") == '{"a": 1}'
+
+def test_prompt_schema_drops_generated_field_titles():
+    from llm.llm_client import get_schema_json
+    schema = {
+        "title": "Report", "type": "object",
+        "properties": {"title": {"title": "Title", "type": "string"}},
+    }
+    assert get_schema_json(schema) == '{"properties":{"title":{"type":"string"}},"title":"Report","type":"object"}'
+
+def test_disk_cache_sweep_evicts_least_recently_read(mock_groq, tmp_path):
+    """Over budget, the entries read longest ago go first; TTL drops stale ones regardless."""
+    import os, time
+    with patch.dict(os.environ, {"GROQ_API_KEY": "dummy_key"}):
+        llm = LLMClient()
+    llm.cache_dir = str(tmp_path)
+    now = time.time()
+    for i, key in enumerate(["aa01", "bb02", "cc03"]):
+        path = llm._cache_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(b"x" * 100)
+        os.utime(path, (now - 300 + i * 100, now - 300 + i * 100))
+
+    llm._max_cache_bytes = 250
+    assert llm._sweep_cache() == 1
+    assert not os.path.exists(llm._cache_path("aa01"))
+    assert os.path.exists(llm._cache_path("bb02"))
+
+    llm._cache_ttl = 150
+    assert llm._sweep_cache() == 1
+    assert os.path.exists(llm._cache_path("cc03"))
+
+    # A leftover from an interrupted write is reclaimed once it is stale
+    orphan = llm._cache_path("dd04") + ".tmp"
+    os.makedirs(os.path.dirname(orphan), exist_ok=True)
+    open(orphan, "wb").close()
+    assert llm._sweep_cache() == 0
+    os.utime(orphan, (now - 3600, now - 3600))
+    assert llm._sweep_cache() == 1 and not os.path.exists(orphan)
+    llm.close()
+
+@pytest.mark.asyncio
+async def test_structured_output_persist_survives_new_client(mock_groq, tmp_path):
+    """With persist, a fresh client (empty memory cache) answers from disk."""
+    mock_response = MagicMock()
+    mock_response.choices[0].message.content = '{"name": "Scenario"}'
+    mock_groq.chat.completions.create = AsyncMock(return_value=mock_response)
+    schema = {"type": "object", "required": ["name"]}
+
+    with patch.dict(os.environ, {"GROQ_API_KEY": "dummy_key"}):
+        first, second = LLMClient(), LLMClient()
+    first.cache_dir = second.cache_dir = str(tmp_path)
+
+    assert await first.generate_structured_output("p", schema, persist=True) == {"name": "Scenario"}
+    await first.flush()
+    assert await second.generate_structured_output("p", schema, persist=True) == {"name": "Scenario"}
+    assert mock_groq.chat.completions.create.await_count == 1
+    first.close()
+    second.close()
+
+@pytest.mark.asyncio
+async def test_inflight_requests_capped_per_loop(client, mock_groq):
+    """A wide fan-out queues on the client's semaphore instead of opening every call at once."""
+    client.max_concurrency = 2
+    active = peak = 0
+
+    async def create(**kwargs):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        response = MagicMock()
+        response.choices[0].finish_reason = "stop"
+        response.choices[0].message.content = "ok"
+        return response
+
+    mock_groq.chat.completions.create = create
+    results = await asyncio.gather(*(client.generate(f"p{i}") for i in range(6)))
+    assert [r["text"] for r in results] == ["ok"] * 6
+    assert peak == 2
+
+@pytest.mark.asyncio
+async def test_structured_output_persist_ttl_skips_stale_entry(mock_groq, tmp_path):
+    """A persisted reply older than `persist_ttl` is fetched again."""
+    mock_response = MagicMock()
+    mock_response.choices[0].message.content = '{"name": "Scenario"}'
+    mock_groq.chat.completions.create = AsyncMock(return_value=mock_response)
+    schema = {"type": "object", "required": ["name"]}
+
+    with patch.dict(os.environ, {"GROQ_API_KEY": "dummy_key", "LLM_CACHE_DIR": str(tmp_path)}):
+        first, second = LLMClient(), LLMClient()
+
+    await first.generate_structured_output("p", schema, persist=True, persist_ttl=3600)
+    await first.flush()
+    for shard in tmp_path.iterdir():
+        for entry in shard.iterdir():
+            os.utime(entry, (0, 0))
+    await second.generate_structured_output("p", schema, persist=True, persist_ttl=3600)
+    assert mock_groq.chat.completions.create.await_count == 2
+    first.close()
+    second.close()
+
+@pytest.mark.asyncio
+async def test_failed_sweep_does_not_fail_the_write(mock_groq, tmp_path, caplog):
+    """A sweep error is logged as such; the entry it followed is still written."""
+    with patch.dict(os.environ, {"GROQ_API_KEY": "dummy_key", "LLM_CACHE_DIR": str(tmp_path)}):
+        llm = LLMClient()
+    with patch.object(llm, "_sweep_cache", side_effect=OSError("disk gone")):
+        await llm._write_cache("ab" * 16, {"text": "t", "meta": {}})
+    assert await llm._read_cache("ab" * 16) == {"text": "t", "meta": {}}
+    assert "Cache sweep failed" in caplog.text and "Failed to write cache" not in caplog.text
+    llm.close()
+
+def test_concurrent_writes_sweep_once(mock_groq, tmp_path):
+    """Pool threads racing past the sweep deadline start a single sweep between them."""
+    from concurrent.futures import ThreadPoolExecutor
+    with patch.dict(os.environ, {"GROQ_API_KEY": "dummy_key", "LLM_CACHE_DIR": str(tmp_path)}):
+        llm = LLMClient()
+    barrier = threading.Barrier(8)
+
+    def write(i):
+        barrier.wait()
+        llm._write_json_file(llm._cache_path(f"{i % 2:02x}{i:030x}"), {"text": str(i)})
+
+    with patch.object(llm, "_sweep_cache", side_effect=lambda: time.sleep(0.05)) as sweep, \
+         ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(write, range(8)))
+    assert sweep.call_count == 1
+    assert llm._shard_dirs == {str(tmp_path / "00"), str(tmp_path / "01")}
+    llm.close()
@@ -0,0 +1,20 @@
+import pytest
+from core.llm_rate_limiter import AsyncTokenBucket, estimate_tokens
+
+def test_request_bucket_defers_burst_overflow():
+    """Requests beyond the per-second burst are told to wait instead of firing."""
+    bucket = AsyncTokenBucket(rps=2, tpm=1_000_000)
+    assert bucket._reserve(0) == 0
+    assert bucket._reserve(0) == 0
+    assert bucket._reserve(0) == pytest.approx(0.5, abs=0.05)
+
+def test_token_bucket_defers_large_requests():
+    """The minute token budget throttles independently of request count."""
+    bucket = AsyncTokenBucket(rps=100, tpm=600)
+    assert bucket._reserve(600) == 0
+    # 60 more tokens at 10 tokens/second
+    assert bucket._reserve(60) == pytest.approx(6.0, abs=0.1)
+
+def test_estimate_tokens():
+    messages = [{"role": "system", "content": "x" * 40}, {"role": "user", "content": "y" * 40}]
+    assert estimate_tokens(messages, 200) == 220
@@ -29,16 +29,14 @@ def mock_agents():
         mock_sec = AsyncMock()
         MockSecCls.return_value = mock_sec
         # Valid Decision object dict
-        mock_sec.run.return_value = {
-            "decision": {
-                "decision_type": "APPROVE",
-                "recommended_action": "Fortify",
-                "confidence": 0.9,
-                "risk_score": 2,
-                "rationale_summary": ["Safe"],
-                "assumptions": []
-            }
-        }
+        mock_sec.run.return_value = Decision(
+            decision_type="APPROVE",
+            recommended_action="Fortify",
+            confidence=0.9,
+            risk_score=2,
+            rationale_summary=["Safe"],
+            assumptions=[]
+        )
         
         mock_constraint = AsyncMock()
         MockConstraintCls.return_value = mock_constraint
@@ -69,28 +67,40 @@ def mock_agents():
         
         mock_sim = AsyncMock()
         MockSimCls.return_value = mock_sim
+        # Same shape SimulationAgent.run returns
         mock_sim.run.return_value = {
-            "simulation_turn": {
-                "turn": 1,
-                "actor": "Actor A",
-                "action": "Fortify",
-                "outcome": "Done",
-                "validation": {"valid": True}
-            }
+            "simulation_result": {
+                "scenarios": [{
+                    "name": "Fortify",
+                    "expected_behaviour": {"A": "Fortify", "B": "Hold", "C": "Hold"},
+                    "stability_assessment": "Stable"
+                }],
+                "comparison_summary": "Fortify is robust"
+            },
+            "simulation_history": ["Fortify: Stable"]
         }
 
         yield
 
 @pytest.mark.asyncio
-async def test_full_run_v0_3_0(mock_agents):
+async def test_full_run_v0_3_0(mock_agents, tmp_path, monkeypatch):
     events = []
     def callback(e):
         events.append(e)
-        
-    result = await manager_run("Test", {}, progress_callback=callback)
+
+    monkeypatch.setenv("RUNS_DIR", str(tmp_path / "runs"))
+    monkeypatch.setenv("LLM_CACHE_DIR", str(tmp_path / "cache"))
+    with patch("orchestration.manager_run.get_shared_client") as get_client:
+        get_client.return_value.flush = AsyncMock()
+        result = await manager_run("Test", {}, progress_callback=callback)
     
     assert result["status"] == RunStatus.SUCCESS
     assert "final_decision" in result
+    # Each compared scenario becomes a history entry
+    assert [h["action"] for h in result["simulation_result"]["history"]] == ["Fortify"]
+    assert result["simulation_result"]["turn_count"] == 1
+    # Per-node timestamp deltas are merged by the state reducer
+    assert {"start", "plan_done", "specialists_done", "constraint_done", "end"} <= result["timestamps"].keys()
     
     event_types = [e["type"] for e in events]
     assert "plan" in event_types
@@ -98,3 +108,298 @@ async def test_full_run_v0_3_0(mock_agents):
     assert "judgment" in event_types
     assert "simulation" in event_types
     assert "done" in event_types
+    assert [p.name for p in (tmp_path / "runs").iterdir()] == [f"{result['run_id']}.json"]
+
+@pytest.mark.asyncio
+async def test_rejected_judgment_stops_at_constraint_retry_cap(mock_agents, tmp_path, monkeypatch):
+    """Each rejection re-runs the constraint check until its retry cap fails closed without an LLM call."""
+    from unittest.mock import MagicMock
+    from orchestration import graph
+    from agents.constraint_agent import ConstraintAgent, MAX_CONSTRAINT_RETRIES
+
+    monkeypatch.setenv("RUNS_DIR", str(tmp_path / "runs"))
+    llm = MagicMock()
+    llm.generate_structured_output = AsyncMock(return_value={"is_safe": True, "warnings": []})
+    judgment = graph.JudgmentAgent.return_value
+    judgment.run.return_value = {
+        "judgment_result": {"is_approved": False, "feedback": "Too risky", "strategic_analysis": "No"}
+    }
+    with patch.dict(graph._AGENTS, clear=True), \
+         patch("agents.base_agent.get_shared_client", return_value=llm), \
+         patch("orchestration.graph.ConstraintAgent", ConstraintAgent), \
+         patch.object(ConstraintAgent, "log") as log, \
+         patch("orchestration.manager_run.get_shared_client") as get_client:
+        get_client.return_value.flush = AsyncMock()
+        result = await manager_run("Test", {})
+
+    assert llm.generate_structured_output.await_count == MAX_CONSTRAINT_RETRIES
+    assert judgment.run.await_count == MAX_CONSTRAINT_RETRIES
+    # The last check hit the cap inside the agent
+    assert log.call_args.args[0].startswith("Retry cap reached")
+    assert result["audit_trail"]["retry_count"] == MAX_CONSTRAINT_RETRIES
+    assert result["simulation_result"] is None
+
+@pytest.mark.asyncio
+async def test_specialists_cancel_after_abort_quorum():
+    """Two qualifying ABORTs settle the verdict; slower specialists are cancelled."""
+    from orchestration.graph import node_specialists
+
+    abort = Decision(
+        decision_type="ABORT", recommended_action="Stand down",
+        confidence=0.9, risk_score=9, rationale_summary=["Critical"]
+    )
+    slow_started = asyncio.Event()
+
+    async def never_finishes(payload):
+        slow_started.set()
+        await asyncio.sleep(3600)
+
+    plan = ExecutionPlan(steps=[
+        {"step_id": "1", "agent": "SECURITY", "objective": "a"},
+        {"step_id": "2", "agent": "TECHNOLOGY", "objective": "b"},
+        {"step_id": "3", "agent": "ECONOMICS", "objective": "c"},
+    ])
+    with patch("orchestration.graph.panel_compatible", return_value=False), \
+         patch("orchestration.graph.SecurityAgent") as Sec, \
+         patch("orchestration.graph.TechnologyAgent") as Tech, \
+         patch("orchestration.graph.EconomicsAgent") as Econ, \
+         patch("orchestration.graph.get_shared_client") as get_client:
+        Sec.return_value.run = AsyncMock(return_value=abort)
+        Tech.return_value.run = AsyncMock(return_value=abort)
+        Econ.return_value.run = never_finishes
+        get_client.return_value.generate = AsyncMock(return_value={"text": "thinking"})
+
+        out = await asyncio.wait_for(node_specialists({"plan": plan, "context": {}}), timeout=5)
+
+    assert slow_started.is_set()
+    sec, tech, econ = out["specialist_decisions"]
+    assert sec.decision.decision_type == DecisionType.ABORT
+    assert tech.decision.decision_type == DecisionType.ABORT
+    assert econ.fault is not None and "abort quorum" in econ.fault.message
+
+@pytest.mark.asyncio
+async def test_specialists_batch_steps_per_agent():
+    """Steps routed to the same specialist go out as one batched call."""
+    from orchestration.graph import node_specialists
+
+    def decision(action):
+        return Decision(
+            decision_type="APPROVE", recommended_action=action,
+            confidence=0.8, risk_score=2, rationale_summary=["ok"]
+        )
+
+    plan = ExecutionPlan(steps=[
+        {"step_id": "1", "agent": "SECURITY", "objective": "a"},
+        {"step_id": "2", "agent": "ECONOMICS", "objective": "b"},
+        {"step_id": "3", "agent": "SECURITY", "objective": "c"},
+    ])
+    with patch("orchestration.graph.panel_compatible", return_value=False), \
+         patch("orchestration.graph.SecurityAgent") as Sec, \
+         patch("orchestration.graph.EconomicsAgent") as Econ, \
+         patch("orchestration.graph.get_shared_client") as get_client:
+        Sec.return_value.run = AsyncMock()
+        Sec.return_value.run_batch = AsyncMock(return_value=[decision("A"), decision("C")])
+        Econ.return_value.run = AsyncMock(return_value=decision("B"))
+        get_client.return_value.generate = AsyncMock(return_value={"text": "thinking"})
+
+        out = await node_specialists({"plan": plan, "context": {}})
+
+    Sec.return_value.run.assert_not_called()
+    assert Sec.return_value.run_batch.await_args.args[0] == ["a", "c"]
+    assert [(sd.agent, sd.decision.recommended_action) for sd in out["specialist_decisions"]] == \
+        [("security", "A"), ("economics", "B"), ("security", "C")]
+
+@pytest.mark.asyncio
+async def test_specialists_time_out_stuck_step():
+    """A stuck specialist is faulted on its own timeout; the other steps keep their decisions."""
+    from orchestration.graph import node_specialists
+
+    async def stuck(payload):
+        await asyncio.sleep(3600)
+
+    plan = ExecutionPlan(steps=[
+        {"step_id": "1", "agent": "SECURITY", "objective": "a"},
+        {"step_id": "2", "agent": "ECONOMICS", "objective": "b"},
+    ])
+    with patch("orchestration.graph.panel_compatible", return_value=False), \
+         patch("orchestration.graph.SPECIALIST_STEP_TIMEOUT", 0.05), \
+         patch("orchestration.graph.SecurityAgent") as Sec, \
+         patch("orchestration.graph.EconomicsAgent") as Econ, \
+         patch("orchestration.graph.get_shared_client") as get_client:
+        Sec.return_value.run = AsyncMock(return_value=Decision(
+            decision_type="APPROVE", recommended_action="Hold",
+            confidence=0.8, risk_score=2, rationale_summary=["ok"]
+        ))
+        Econ.return_value.run = stuck
+        get_client.return_value.generate = AsyncMock(return_value={"text": "thinking"})
+
+        out = await asyncio.wait_for(node_specialists({"plan": plan, "context": {}}), timeout=5)
+
+    sec, econ = out["specialist_decisions"]
+    assert sec.decision.recommended_action == "Hold"
+    assert econ.fault.fault_type == "TIMEOUT"
+
+@pytest.mark.asyncio
+async def test_specialists_panel_call_for_mixed_plan():
+    """Compatible specialists share one panel call; a failed panel falls back to per-agent calls."""
+    from orchestration.graph import node_specialists
+
+    def decision(action):
+        return Decision(
+            decision_type="APPROVE", recommended_action=action,
+            confidence=0.8, risk_score=2, rationale_summary=["ok"]
+        )
+
+    plan = ExecutionPlan(steps=[
+        {"step_id": "1", "agent": "SECURITY", "objective": "a"},
+        {"step_id": "2", "agent": "ECONOMICS", "objective": "b"},
+    ])
+    with patch("orchestration.graph.SecurityAgent") as Sec, \
+         patch("orchestration.graph.EconomicsAgent") as Econ, \
+         patch("orchestration.graph.PANEL_ENABLED", True), \
+         patch("orchestration.graph.panel_compatible", return_value=True), \
+         patch("orchestration.graph.run_panel", AsyncMock(return_value=[decision("A"), decision("B")])) as panel, \
+         patch("orchestration.graph.get_shared_client") as get_client:
+        Sec.return_value.run = AsyncMock(return_value=decision("A2"))
+        Econ.return_value.run = AsyncMock(return_value=decision("B2"))
+        get_client.return_value.generate = AsyncMock(return_value={"text": "thinking"})
+
+        out = await node_specialists({"plan": plan, "context": {}})
+        assert [sd.decision.recommended_action for sd in out["specialist_decisions"]] == ["A", "B"]
+        assert [text for _, text in panel.await_args.args[0]] == ["a", "b"]
+        Sec.return_value.run.assert_not_called()
+
+        panel.side_effect = ValueError("panel: expected 2 decisions, got 1")
+        out = await node_specialists({"plan": plan, "context": {}})
+        assert [sd.decision.recommended_action for sd in out["specialist_decisions"]] == ["A2", "B2"]
+
+@pytest.mark.asyncio
+async def test_specialists_panel_is_opt_in_for_real_agents():
+    """Real specialists are panel-compatible, but the panel is only used with SPECIALIST_PANEL set."""
+    from unittest.mock import MagicMock
+    from orchestration import graph
+
+    item = {"decision_type": "APPROVE", "recommended_action": "Hold", "confidence": 0.8,
+            "risk_score": 2, "rationale_summary": ["ok"]}
+
+    async def reply(*args, **kw):
+        model = kw["response_model"]
+        if model.__name__.endswith("Batch"):
+            return model.model_validate({"decisions": [item, item]})
+        return model.model_validate(item)
+
+    plan = ExecutionPlan(steps=[
+        {"step_id": "1", "agent": "SECURITY", "objective": "a"},
+        {"step_id": "2", "agent": "ECONOMICS", "objective": "b"},
+    ])
+    client = MagicMock()
+    client.generate_structured_output = AsyncMock(side_effect=reply)
+    client.generate = AsyncMock(return_value={"text": "thinking"})
+    with patch.dict(graph._AGENTS, clear=True), \
+         patch("agents.base_agent.get_shared_client", return_value=client), \
+         patch("orchestration.graph.get_shared_client", return_value=client):
+        out = await graph.node_specialists({"plan": plan, "context": {}})
+        # Default: one call per agent
+        assert client.generate_structured_output.await_count == 2
+        assert [sd.agent for sd in out["specialist_decisions"]] == ["security", "economics"]
+
+        client.generate_structured_output.reset_mock()
+        with patch("orchestration.graph.PANEL_ENABLED", True):
+            out = await graph.node_specialists({"plan": plan, "context": {}})
+        assert client.generate_structured_output.await_count == 1
+        assert client.generate_structured_output.await_args.kwargs["response_model"].__name__ == "DecisionBatch"
+        assert [sd.decision.recommended_action for sd in out["specialist_decisions"]] == ["Hold", "Hold"]
+
+@pytest.mark.asyncio
+async def test_run_panel_combines_roles_and_checks_count(tmp_path):
+    """One call carries every role's prompt and tagged instructions; a mis-sized reply is rejected, not cached."""
+    import os
+    from unittest.mock import MagicMock
+    from llm import llm_client
+    from llm.llm_client import LLMClient, JSONGenerationError
+    from agents.security_agent import SecurityAgent
+    from agents.economics_agent import EconomicsAgent
+    from agents.specialist_agent import panel_compatible, run_panel
+
+    item = ('{"decision_type": "APPROVE", "recommended_action": "%s", "confidence": 0.8, '
+            '"risk_score": 2, "rationale_summary": ["ok"]}')
+    reply = MagicMock()
+    llm_client._load_groq()
+    with patch("llm.llm_client.AsyncGroq") as Groq, \
+         patch("llm.llm_client.DefaultAsyncHttpxClient"), \
+         patch.dict(os.environ, {"GROQ_API_KEY": "dummy_key", "LLM_CACHE_DIR": str(tmp_path)}):
+        create = Groq.return_value.chat.completions.create = AsyncMock(return_value=reply)
+        client = LLMClient()
+        with patch("agents.base_agent.get_shared_client", return_value=client):
+            sec, econ = SecurityAgent(), EconomicsAgent()
+        assert panel_compatible([sec, econ])
+
+        reply.choices[0].message.content = '{"decisions": [%s]}' % (item % "Hold")
+        for _ in range(2):
+            with pytest.raises(JSONGenerationError):
+                await run_panel([(sec, "a"), (econ, "b")], "{}")
+        # Nothing was cached, so the repeat went back to the API
+        assert create.await_count == 2
+
+        reply.choices[0].message.content = '{"decisions": [%s, %s]}' % (item % "Hold", item % "Trade")
+        decisions = await run_panel([(sec, "c"), (econ, "d")], '{"x":1}')
+        assert [d.recommended_action for d in decisions] == ["Hold", "Trade"]
+
+        messages = create.await_args.kwargs["messages"]
+        assert "1. [SECURITY] c\n2. [ECONOMICS] d" in messages[1]["content"]
+        system = messages[0]["content"]
+        assert system.index("=== ECONOMICS ===") < system.index("=== SECURITY ===")
+        assert sec.system_prompt in system and econ.system_prompt in system
+        assert create.await_args.kwargs["max_completion_tokens"] == sec.max_tokens + econ.max_tokens
+        await client.flush()
+        client.close()
+
+@pytest.mark.asyncio
+async def test_simulation_agent_accepts_scenario_reply(tmp_path):
+    """A reply in the shape SIMULATION_SYSTEM_PROMPT asks for validates and yields per-scenario history."""
+    import json
+    from unittest.mock import MagicMock
+    from llm import llm_client
+    from llm.llm_client import LLMClient
+    from agents.simulation_agent import SimulationAgent
+
+    analysis = {
+        "scenarios": [
+            {
+                "name": "Scenario 1: Fortify",
+                "assumptions": ["B stays defensive", "C remains neutral"],
+                "expected_behaviour": {"A": "Hardens borders", "B": "Mirrors build-up", "C": "Hedges"},
+                "qualitative_payoffs": {"A": "medium: security gains", "B": "low: costs rise", "C": "medium: trade continues"},
+                "stability_assessment": "Stable; no actor gains from deviating"
+            },
+            {
+                "name": "Scenario 2: Negotiate",
+                "assumptions": ["B accepts talks"],
+                "expected_behaviour": {"A": "Opens talks", "B": "Delays", "C": "Mediates"},
+                "qualitative_payoffs": {"A": "high: lower costs", "B": "medium", "C": "high: broker role"},
+                "stability_assessment": "Fragile if B stalls"
+            }
+        ],
+        "comparison_summary": "Fortify is robust; negotiation pays more but depends on B.",
+        "recommended_strategy_for_A": ["Fortify first", "Keep talks open"],
+        "key_risks_and_contingencies": ["B escalates"]
+    }
+    reply = MagicMock()
+    reply.choices[0].message.content = json.dumps(analysis)
+    llm_client._load_groq()
+    with patch("llm.llm_client.AsyncGroq") as Groq, \
+         patch("llm.llm_client.DefaultAsyncHttpxClient"), \
+         patch.dict(os.environ, {"GROQ_API_KEY": "dummy_key", "LLM_CACHE_DIR": str(tmp_path)}):
+        Groq.return_value.chat.completions.create = AsyncMock(return_value=reply)
+        client = LLMClient()
+        with patch("agents.base_agent.get_shared_client", return_value=client):
+            agent = SimulationAgent()
+        out = await agent.run({"final_decision": {}, "consensus_score": 0.9})
+        await client.flush()
+        client.close()
+
+    assert out["simulation_result"]["recommended_strategy_for_A"] == ["Fortify first", "Keep talks open"]
+    assert out["simulation_history"] == [
+        "Scenario 1: Fortify: Stable; no actor gains from deviating",
+        "Scenario 2: Negotiate: Fragile if B stalls",
+    ]
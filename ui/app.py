@@ -5,6 +5,7 @@ import json
 import pandas as pd
 import sys
 import os
+import logging
 from datetime import datetime
 from dotenv import load_dotenv
 
@@ -14,6 +15,8 @@ env_path = os.path.join(project_root, '.env')
 load_dotenv(env_path)
 sys.path.append(project_root)
 
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
 from ui._worker import Worker
 from ui import components
 